@@ -0,0 +1,49 @@
+"""
+Login hashing throughput vs. process pool size.
+
+Runs a burst of concurrent Argon2 verifies (the CPU part of POST /auth/login) through
+the async hashing service for every pool size from 1 to the core count.
+
+    python -m bench.bench_hashing --requests 64
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from qftb.config import settings
+from qftb.util import password
+
+
+async def _burst(hashed: str, requests: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(password.verify_password_async("1Correcthorsebattery", hashed) for _ in range(requests))
+    )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    hashed = password.hash("1Correcthorsebattery")
+    print(f"{'workers':>8} {'logins/s':>10} {'speedup':>8}")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        settings.PASSWORD_HASH_WORKERS = workers
+        password.shutdown_executor()
+        # warm the pool so process start up is not measured
+        asyncio.run(_burst(hashed, workers))
+        elapsed = asyncio.run(_burst(hashed, args.requests))
+        throughput = args.requests / elapsed
+        baseline = baseline or throughput
+        print(f"{workers:>8} {throughput:>10.1f} {throughput / baseline:>7.2f}x")
+    password.shutdown_executor()
+
+
+if __name__ == "__main__":
+    main()
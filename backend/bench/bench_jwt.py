@@ -0,0 +1,45 @@
+"""
+Access token sign/verify cost per JWT algorithm.
+
+    python -m bench.bench_jwt --iterations 2000
+"""
+
+import argparse
+import time
+from datetime import UTC, datetime, timedelta
+
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from qftb.util.jwks import KeyRing
+
+KEYS = {
+    "HS256": lambda: "bench-secret-key-with-at-least-32-bytes",
+    "RS256": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+    "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "EdDSA": ed25519.Ed25519PrivateKey.generate,
+}
+
+
+def _per_op_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    payload = {"sub": "user@example.com", "id": 1, "exp": datetime.now(UTC) + timedelta(hours=1)}
+    print(f"{'algorithm':<10} {'sign us':>10} {'verify us':>10} {'token bytes':>12}")
+    for algorithm, make_key in KEYS.items():
+        keyring = KeyRing(algorithm, make_key())
+        token = keyring.encode(payload)
+        sign = _per_op_us(lambda: keyring.encode(payload), args.iterations)
+        verify = _per_op_us(lambda: keyring.decode(token), args.iterations)
+        print(f"{algorithm:<10} {sign:>10.1f} {verify:>10.1f} {len(token):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Request latency under log backpressure: direct stream writes against the queue handler.
+
+Runs the logging scenarios of bench_load (login and logout log on every request) with
+the qftb loggers writing to a sink that stalls each write for --stall-ms, like a full
+container log pipe. "direct" writes from the request, "queue" hands records to the
+listener thread as logging.yml does; "baseline" is a direct write to a sink that
+never stalls.
+
+    python -m bench.bench_logging --stall-ms 2
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import tempfile
+import time
+
+from qftb.database import async_url, get_db, pool_options
+from qftb.main import app
+from qftb.util.log import JsonFormatter, RequestIdFilter, queue_handler
+from qftb.util.password import shutdown_executor
+from qftb.util.ratelimit import MemoryRateLimiter, get_refresh_limiter
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from bench.bench_load import Fixture, run_scenario, scenario_requests
+
+MODES = ("baseline", "direct", "queue")
+SCENARIOS = ("logout", "login")
+
+
+class StalledStream(io.TextIOBase):
+    """
+    Blocks the writing thread for stall seconds per write.
+    """
+
+    def __init__(self, stall: float):
+        self.stall = stall
+
+    def write(self, s: str) -> int:
+        if self.stall:
+            time.sleep(self.stall)
+        return len(s)
+
+
+def log_to(mode: str, stall: float) -> logging.Handler:
+    sink = logging.StreamHandler(StalledStream(0 if mode == "baseline" else stall))
+    sink.setFormatter(JsonFormatter())
+    handler = queue_handler([sink]) if mode == "queue" else sink
+    handler.addFilter(RequestIdFilter())
+    logger = logging.getLogger("qftb")
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if mode == "queue":
+        handler.listener.start()
+    return handler
+
+
+async def run(args: argparse.Namespace) -> None:
+    url = f"sqlite:///{tempfile.mkdtemp(prefix='qftb-bench-')}/bench.db"
+    engine = create_async_engine(async_url(url), **pool_options(url))
+    fixture = Fixture(engine, args.users)
+    await fixture.setup()
+
+    async def override_get_db():
+        async with fixture.session_factory() as db:
+            yield db
+
+    refresh_limiter = MemoryRateLimiter(1_000_000_000, 1)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_refresh_limiter] = lambda: refresh_limiter
+
+    print(f"stall {args.stall_ms} ms per write, concurrency {args.concurrency}")
+    header = ("scenario", "mode", "req/s", "p50 ms", "p95 ms", "p99 ms", "backlog")
+    print(f"{header[0]:<9} {header[1]:<9}" + "".join(f" {h:>9}" for h in header[2:]))
+    try:
+        for name in args.scenarios:
+            requests = args.login_requests if name == "login" else args.requests
+            for mode in MODES:
+                handler = log_to(mode, args.stall_ms / 1000)
+                send, prepare = await scenario_requests(name, fixture, requests, args.concurrency)
+                result = await run_scenario(send, prepare, requests, args.concurrency)
+                backlog = handler.queue.qsize() if mode == "queue" else 0
+                if mode == "queue":
+                    handler.listener.stop()
+                print(
+                    f"{name:<9} {mode:<9} {result['rps']:>9.1f} {result['p50_ms']:>9.2f}"
+                    f" {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {backlog:>9}"
+                )
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+        shutdown_executor()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", type=lambda v: v.split(","), default=list(SCENARIOS))
+    parser.add_argument("--stall-ms", type=float, default=2.0)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=1000, help="per mode")
+    parser.add_argument("--login-requests", type=int, default=100, help="Argon2 bound")
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
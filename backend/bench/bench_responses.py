@@ -0,0 +1,99 @@
+"""
+Request latency through the full app, in process: routing, dependencies, JSON body.
+
+Runs the ASGI app against in-memory SQLite with --users users and reports the mean
+and p50 per endpoint. Login includes one Argon2 verification per request.
+
+    python -m bench.bench_responses --requests 2000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from qftb.database import Base, get_db
+from qftb.main import app
+from qftb.models import User
+from qftb.util.password import hash
+from qftb.util.ratelimit import MemoryRateLimiter, get_refresh_limiter
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+PASSWORD = "BenchPassword1"
+
+
+async def _timed(client: httpx.AsyncClient, requests: int, send) -> list[float]:
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        res = await send(client)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+        assert res.status_code == 200, res.text
+    return samples
+
+
+async def run(users: int, requests: int, logins: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        hashed_password = hash(PASSWORD)
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    "first_name": f"first{i}",
+                    "last_name": f"last{i}",
+                    "email": f"user{i}@example.com",
+                    "hashed_password": hashed_password,
+                }
+                for i in range(users)
+            ],
+        )
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    refresh_limiter = MemoryRateLimiter(1_000_000, 60)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_refresh_limiter] = lambda: refresh_limiter
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        login = {"username": "user0@example.com", "password": PASSWORD}
+        token = (await client.post("/auth/login", data=login)).json()["accessToken"]
+        auth = {"Authorization": f"Bearer {token}"}
+        endpoints = {
+            "GET /user?limit=100": (requests, lambda c: c.get("/user", params={"limit": 100})),
+            "GET /user/{id}": (requests, lambda c: c.get("/user/1", headers=auth)),
+            "POST /auth/login": (logins, lambda c: c.post("/auth/login", data=login)),
+        }
+        print(f"{users:,} users")
+        print(f"{'endpoint':<22} {'requests':>9} {'mean us':>10} {'p50 us':>10}")
+        for name, (count, send) in endpoints.items():
+            await _timed(client, min(count, 50), send)  # warm up
+            samples = await _timed(client, count, send)
+            print(
+                f"{name:<22} {count:>9} {statistics.fmean(samples):>10.0f}"
+                f" {statistics.median(samples):>10.0f}"
+            )
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--logins", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.requests, args.logins))
+
+
+if __name__ == "__main__":
+    main()
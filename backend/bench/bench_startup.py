@@ -0,0 +1,77 @@
+"""
+Startup time: process start to the first 200 from /health.
+
+Starts `uvicorn qftb.main:app` --runs times against the database in DB_URL and polls
+/health until it answers, reporting the min, median and max. The import of
+qftb.main alone is timed in a separate interpreter for comparison.
+
+    DB_URL=sqlite:///startup.db python -m bench.bench_startup --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_APP = (
+    "import time; start = time.perf_counter(); import qftb.main; print(time.perf_counter() - start)"
+)
+
+
+def time_to_health(port: int, timeout: float) -> float:
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--port", str(port), "qftb.main:app"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=1) as client:
+            while time.perf_counter() - start < timeout:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with {server.returncode}")
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                        return time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.005)
+        raise TimeoutError(f"/health not ready after {timeout} s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def time_import() -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_APP], capture_output=True, text=True, check=True
+    )
+    return float(out.stdout)
+
+
+def report(name: str, samples: list[float]) -> None:
+    ms = [s * 1000 for s in samples]
+    print(
+        f"{name:<16} min {min(ms):8.1f} ms  median {statistics.median(ms):8.1f} ms"
+        f"  max {max(ms):8.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    print(f"DB_URL={os.environ.get('DB_URL', '(default)')}, {args.runs} runs")
+    report("import", [time_import() for _ in range(args.runs)])
+    report("start to /health", [time_to_health(args.port, args.timeout) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
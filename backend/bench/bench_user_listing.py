@@ -0,0 +1,89 @@
+"""
+User listing: ORM entities + response_model validation vs. projected rows to JSON.
+
+Loads --rows users into in-memory SQLite and times one full listing per path, then
+repeats it under tracemalloc for the peak allocation figure.
+
+    python -m bench.bench_user_listing --rows 100000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from pydantic import TypeAdapter
+from qftb.database import Base
+from qftb.models import User
+from qftb.schemas import UserResponse
+from qftb.service.user_service import USER_ROWS
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+USERS = TypeAdapter(list[UserResponse])
+
+
+async def orm_path(db: AsyncSession) -> bytes:
+    # what GET /user did: full entities, response_model validation, stdlib json
+    users = (await db.execute(select(User))).scalars().all()
+    validated = USERS.validate_python(users, from_attributes=True)
+    return json.dumps(USERS.dump_python(validated, mode="json", by_alias=True)).encode()
+
+
+async def projected_path(db: AsyncSession) -> bytes:
+    rows = (await db.execute(USER_ROWS.select())).all()
+    return USER_ROWS.dumps(rows)
+
+
+async def measure(engine, path) -> tuple[float, float]:
+    # timed and traced separately, tracemalloc slows allocation-heavy code a lot
+    async with AsyncSession(engine) as db:
+        start = time.perf_counter()
+        await path(db)
+        elapsed = time.perf_counter() - start
+    async with AsyncSession(engine) as db:
+        tracemalloc.start()
+        await path(db)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed * 1000, peak / 1024 / 1024
+
+
+async def run(rows: int, repeat: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    "first_name": f"first{i}",
+                    "last_name": f"last{i}",
+                    "email": f"user{i}@example.com",
+                    "hashed_password": "$argon2id$v=19$m=65536,t=3,p=4$" + "x" * 64,
+                }
+                for i in range(rows)
+            ],
+        )
+
+    print(f"{rows:,} users, best of {repeat}")
+    print(f"{'path':<10} {'ms':>10} {'peak MiB':>10}")
+    for name, path in (("orm", orm_path), ("projected", projected_path)):
+        results = [await measure(engine, path) for _ in range(repeat)]
+        elapsed, peak = min(results)
+        print(f"{name:<10} {elapsed:>10.1f} {peak:>10.1f}")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py qftb.main:app
+
+WEB_CONCURRENCY sets the number of workers, by default one per core of the
+container's CPU quota. The app is imported once in the master and forked into the
+workers; GUNICORN_PRELOAD=false imports it in every worker instead. Each worker's
+Argon2 pool gets an equal share of the quota unless PASSWORD_HASH_WORKERS is set.
+"""
+
+import os
+from pathlib import Path
+
+import yaml
+from qftb.util.cpu import available_cpus
+from qftb.util.log import start_log_listeners
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY", 0)) or available_cpus()
+# not through qftb.config: settings are read on import, before PASSWORD_HASH_WORKERS
+# below is set
+if os.environ.get("REFRESH_FILTER") == "local" and workers > 1:
+    # every worker would reject the refresh tokens issued by the others
+    raise RuntimeError(
+        f'REFRESH_FILTER=local with {workers} workers: use "redis", or WEB_CONCURRENCY=1'
+    )
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() != "false"
+# read before the app is imported, workers * hash processes stays within the quota
+os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, available_cpus() // workers)))
+
+# gunicorn and uvicorn logs go through the same JSON queue handler as the app
+logconfig_dict = yaml.safe_load(Path(__file__).with_name("logging.yml").read_text())
+
+
+def on_starting(server):
+    # the master logs too
+    start_log_listeners()
+
+
+def post_fork(server, worker):
+    # a forked worker has fresh queues without a listener, start it before the app
+    # boots so a failing import is still logged
+    start_log_listeners()
+
+
+def child_exit(server, worker):
+    # drop the live gauges of a dead worker from the shared metrics directory
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
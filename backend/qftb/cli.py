@@ -0,0 +1,155 @@
+"""
+Operational commands
+
+    qftb migrate
+    qftb reap-tokens [--once]
+    qftb gen-jwt-key [--algorithm ES256] > jwt-key.pem
+    qftb import-users users.csv > issues.ndjson
+    qftb calibrate-argon2 --target-ms 100 >> .env
+"""
+
+import argparse
+import asyncio
+import sys
+
+from .config import settings
+from .util.imports import IMPORT_FORMATS
+
+
+def migrate(args: argparse.Namespace) -> None:
+    from .database import async_engine, create_schema
+
+    async def run() -> None:
+        try:
+            await create_schema()
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(run())
+
+
+def reap_tokens(args: argparse.Namespace) -> None:
+    from .service.token_reaper import TokenReaper
+
+    reaper = TokenReaper(
+        batch_size=args.batch_size, interval=args.interval, batch_pause=args.batch_pause
+    )
+    asyncio.run(reaper.reap_once() if args.once else reaper.run_forever())
+
+
+def gen_jwt_key(args: argparse.Namespace) -> None:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    generators = {
+        "RS256": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+        "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+        "EdDSA": ed25519.Ed25519PrivateKey.generate,
+    }
+    key = generators[args.algorithm]()
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    print(pem.decode(), end="")
+
+
+async def _import_users(args: argparse.Namespace) -> None:
+    from .database import AsyncSessionLocal
+    from .service.user_service import UserService
+    from .util.imports import file_chunks, read_records
+    from .util.password import shutdown_executor
+
+    data_format = args.format or ("csv" if args.file.endswith(".csv") else "ndjson")
+    try:
+        with open(args.file, "rb") as file:
+            async with AsyncSessionLocal() as db:
+                batches = UserService(db, db).import_users(
+                    read_records(file_chunks(file), data_format), args.batch_size
+                )
+                async for progress in batches:
+                    for issue in progress.issues:
+                        print(issue.model_dump_json(by_alias=True))
+                    print(
+                        f"received {progress.received} created {progress.created} "
+                        f"conflicts {progress.conflicts} invalid {progress.invalid}",
+                        file=sys.stderr,
+                    )
+    finally:
+        shutdown_executor()
+
+
+def import_users(args: argparse.Namespace) -> None:
+    asyncio.run(_import_users(args))
+
+
+def calibrate_argon2(args: argparse.Namespace) -> None:
+    from .util.password import calibrate, pool_size
+
+    print(
+        f"Calibrating for p99 verify <= {args.target_ms} ms with {pool_size()} busy workers",
+        file=sys.stderr,
+    )
+    time_cost, memory_cost, p99 = calibrate(
+        args.target_ms, args.parallelism, args.max_memory_mib * 1024, args.samples
+    )
+    print(
+        f"time_cost={time_cost} memory_cost={memory_cost // 1024} MiB "
+        f"parallelism={args.parallelism}: p99 {p99:.1f} ms",
+        file=sys.stderr,
+    )
+    if p99 > args.target_ms:
+        print("Target not reachable above the memory floor, add CPU or raise it", file=sys.stderr)
+    print(f"ARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST={memory_cost}")
+    print(f"ARGON2_PARALLELISM={args.parallelism}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="qftb")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migration = commands.add_parser("migrate", help="create missing tables and indexes")
+    migration.set_defaults(handler=migrate)
+
+    reap = commands.add_parser("reap-tokens", help="delete expired and revoked refresh tokens")
+    reap.add_argument("--once", action="store_true", help="single pass instead of a loop")
+    reap.add_argument("--batch-size", type=int, default=settings.TOKEN_REAPER_BATCH_SIZE)
+    reap.add_argument("--interval", type=float, default=settings.TOKEN_REAPER_INTERVAL)
+    reap.add_argument("--batch-pause", type=float, default=settings.TOKEN_REAPER_BATCH_PAUSE)
+    reap.set_defaults(handler=reap_tokens)
+
+    gen_key = commands.add_parser("gen-jwt-key", help="print a new PEM private key for JWTs")
+    gen_key.add_argument("--algorithm", choices=["RS256", "ES256", "EdDSA"], default="ES256")
+    gen_key.set_defaults(handler=gen_jwt_key)
+
+    imports = commands.add_parser(
+        "import-users",
+        help="bulk create users, skipped rows go to stdout as NDJSON, progress to stderr",
+    )
+    imports.add_argument(
+        "file", help="NDJSON, or CSV with a firstName,lastName,email,password header"
+    )
+    imports.add_argument(
+        "--format", choices=IMPORT_FORMATS, help="default: from the file extension"
+    )
+    imports.add_argument("--batch-size", type=int, default=settings.USER_IMPORT_BATCH_SIZE)
+    imports.set_defaults(handler=import_users)
+
+    calibration = commands.add_parser(
+        "calibrate-argon2",
+        help="print ARGON2_* settings meeting the p99 verify target on this host",
+    )
+    calibration.add_argument("--target-ms", type=float, default=settings.ARGON2_TARGET_P99_MS)
+    calibration.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM)
+    calibration.add_argument("--max-memory-mib", type=int, default=256)
+    calibration.add_argument("--samples", type=int, default=50, help="verifies per candidate")
+    calibration.set_defaults(handler=calibrate_argon2)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
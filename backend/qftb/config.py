@@ -3,11 +3,80 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DB_URL: str = "postgresql://postgres:postgres@db/postgres"
+    # Create missing tables at startup, for local development. Deployments run
+    # `qftb migrate` once instead of every worker checking the schema.
+    DB_CREATE_SCHEMA: bool = False
+    # Per worker process: keep workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) * replicas
+    # below Postgres max_connections minus a reserve, see README.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Read replicas (same scheme as DB_URL) for the user listings and lookups, each
+    # with its own pool of the size above. Writes and tokens stay on the primary.
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_CHECK_INTERVAL: float = 5
+    DB_REPLICA_CHECK_TIMEOUT: float = 2
+    # Seconds a client reads from the primary after a request of its wrote, 0 disables
+    DB_READ_YOUR_WRITES: float = 0
     JWT_SECRET_KEY: str = ""
     ALGO: str = ""
+    # HS* sign with JWT_SECRET_KEY; RS256/ES256/EdDSA sign with the PEM private key file
+    # and publish it on /.well-known/jwks.json. Retired public keys still verify.
+    JWT_KEY_ID: str = ""
+    JWT_PRIVATE_KEY_FILE: str = ""
+    JWT_RETIRED_KEY_FILES: list[str] = []
+    JWKS_MAX_AGE: int = 300
+    # Verified access tokens kept in memory per worker, 0 disables
+    JWT_CACHE_SIZE: int = 10_000
+    # GET /user/{id} bodies kept in memory per worker, 0 disables. Writes drop the
+    # entry locally, "redis" invalidation drops it on every worker, the TTL bounds
+    # staleness otherwise.
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL: float = 60
+    USER_CACHE_INVALIDATION: str = "local"
     ALLOWED_IP_ADDRESSES: list[str] = []
     CLIENT_BASE_URL: str = ""
     ENVIRONMENT: str = "local"
+    # Prometheus /metrics, request timing and SQLAlchemy query events. Set
+    # PROMETHEUS_MULTIPROC_DIR as well when running several workers, see README.
+    METRICS_ENABLED: bool = False
+    # OpenTelemetry spans (needs the `tracing` extra). Exporter "console", "file"
+    # (JSON lines in TRACING_FILE) or "otlp" (HTTP to a local collector).
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "console"
+    TRACING_FILE: str = "traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SAMPLE_RATIO: float = 0.1
+    TRACING_SERVICE_NAME: str = "qftb"
+    # Argon2 process pool size per worker, 0 uses every core of the CPU quota
+    PASSWORD_HASH_WORKERS: int = 0
+    # Argon2id cost, `qftb calibrate-argon2` prints values for this host. Stored hashes
+    # with other parameters are rehashed on the next successful login.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    ARGON2_TARGET_P99_MS: float = 100
+    # Rows per hash + INSERT + commit round of a bulk user import
+    USER_IMPORT_BATCH_SIZE: int = 1000
+    # Expired/revoked refresh token clean up, in-process or via `qftb reap-tokens`
+    TOKEN_REAPER_ENABLED: bool = False
+    TOKEN_REAPER_BATCH_SIZE: int = 1000
+    TOKEN_REAPER_INTERVAL: float = 300
+    TOKEN_REAPER_BATCH_PAUSE: float = 0.1
+    # Reject dead refresh tokens in memory: "off", "local" (single worker process only)
+    # or "redis" (every worker and pod shares issued tokens), see README
+    REFRESH_FILTER: str = "off"
+    REFRESH_FILTER_CAPACITY: int = 1_000_000
+    REFRESH_FILTER_ERROR_RATE: float = 0.01
+    REFRESH_FILTER_REBUILD_INTERVAL: float = 600
+    # Refresh rate limit, "memory" is per worker, "redis" is shared across workers
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    REFRESH_RATE_LIMIT: int = 3
+    REFRESH_RATE_WINDOW: float = 60
+    REDIS_URL: str = "redis://localhost:6379/0"
 
 
 settings = Settings()
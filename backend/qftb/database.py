@@ -1,19 +1,97 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import os
+
+from fastapi import Depends
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 
 from .config import settings
+from .util.pool import InstrumentedQueuePool
+from .util.replicas import ReplicaSet, primary_pinned
+
+# async drivers for the sync DB_URL schemes
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def async_url(url: str) -> URL:
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername))
+
+
+def pool_options(url: str) -> dict:
+    """
+    Queue pool settings, SQLite keeps SQLAlchemy's own pool choice.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+async_engine = create_async_engine(
+    async_url(settings.DB_URL), echo=False, **pool_options(settings.DB_URL)
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
-engine = create_engine(settings.DB_URL, echo=False)
+replicas = ReplicaSet(
+    [
+        create_async_engine(async_url(url), echo=False, **pool_options(url))
+        for url in settings.DB_REPLICA_URLS
+    ],
+    timeout=settings.DB_REPLICA_CHECK_TIMEOUT,
+)
 
-Sessionlocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _dispose_after_fork() -> None:
+    # a forked worker must not share the parent's pooled connections: drop them
+    # without closing (they belong to the parent) and let the child open its own
+    for engine in (async_engine, *replicas.engines):
+        engine.sync_engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_dispose_after_fork)
 
 
 Base = declarative_base()
 
 
-def get_db():
-    db = Sessionlocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def get_read_db(db: AsyncSession = Depends(get_db)):
+    """
+    Session for reads that tolerate replica lag: the next healthy replica, or the
+    request's primary session when there is none or the client is pinned to the
+    primary after a write.
+    """
+    engine = None if primary_pinned() else replicas.pick()
+    if engine is None:
+        yield db
+        return
+    async with AsyncSessionLocal(bind=engine) as read_db:
+        yield read_db
+
+
+async def create_schema() -> None:
+    """
+    CREATE the tables and indexes that do not exist yet. Run by `qftb migrate`, or at
+    startup with DB_CREATE_SCHEMA; existing tables are left as they are.
+    """
+    from . import models  # noqa: F401  registers the tables on Base.metadata
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
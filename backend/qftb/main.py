@@ -1,14 +1,51 @@
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
-from .database import Base, engine
+from .database import async_engine, create_schema, replicas
 from .exceptions import global_handler
-from .routers import admin, auth, health, users
+from .routers import admin, auth, health, metrics, users, wellknown
+from .service.token_filter import token_filter
+from .service.token_reaper import reaper
+from .service.user_service import NEXT_CURSOR_HEADER, listen_user_invalidations
+from .util.log import REQUEST_ID_HEADER, RequestIdMiddleware, start_log_listeners
+from .util.metrics import MetricsMiddleware, instrument_engine
 from .util.openapi import custom_openapi, set_docs_url
+from .util.password import shutdown_executor
+from .util.replicas import ReadYourWritesMiddleware, track_writes
+from .util.responses import FastJSONResponse
+from .util.tracing import TracingMiddleware, configure_tracing, shutdown_tracing, trace_engine
+
 
-# Comment out if you want to build from DDL file.
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # here rather than at import, so forked workers get their own listener thread
+    start_log_listeners()
+    if settings.DB_CREATE_SCHEMA:
+        await create_schema()
+    tasks = []
+    if app.openapi_url:
+        # built in the background after startup instead of on the first /openapi.json
+        tasks.append(asyncio.create_task(asyncio.to_thread(app.openapi)))
+    if replicas.engines:
+        tasks.append(asyncio.create_task(replicas.monitor(settings.DB_REPLICA_CHECK_INTERVAL)))
+    if settings.TOKEN_REAPER_ENABLED:
+        tasks.append(asyncio.create_task(reaper.run_forever()))
+    if token_filter.enabled:
+        tasks.append(asyncio.create_task(token_filter.run_forever()))
+    if settings.USER_CACHE_INVALIDATION == "redis":
+        tasks.append(asyncio.create_task(listen_user_invalidations()))
+    yield
+    for task in tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    shutdown_executor()
+    shutdown_tracing()
 
 
 app = FastAPI(
@@ -16,12 +53,15 @@ app = FastAPI(
     description="Example Description",
     version="1.0.0",
     openapi_url=set_docs_url(),
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 app.include_router(health.router)
 app.include_router(users.router)
 app.include_router(admin.router)
 app.include_router(auth.router)
+app.include_router(wellknown.router)
 
 origins = [settings.CLIENT_BASE_URL]
 
@@ -31,7 +71,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, REQUEST_ID_HEADER],
 )
+app.add_middleware(RequestIdMiddleware)
+
+if replicas.engines and settings.DB_READ_YOUR_WRITES > 0:
+    app.add_middleware(ReadYourWritesMiddleware, window=settings.DB_READ_YOUR_WRITES)
+    track_writes(async_engine.sync_engine)
+
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
+    app.add_middleware(MetricsMiddleware)
+    for engine in (async_engine, *replicas.engines):
+        instrument_engine(engine.sync_engine)
+
+if settings.TRACING_ENABLED:
+    configure_tracing()
+    # outermost, so the request span covers the other middleware
+    app.add_middleware(TracingMiddleware)
+    for engine in (async_engine, *replicas.engines):
+        trace_engine(engine.sync_engine)
 
 # Global Exceptions
 global_handler(app)
@@ -0,0 +1,20 @@
+-- Store refresh tokens as SHA-256 digests and index the hot lookups.
+--
+-- Existing cookies keep working: the digest of each stored token is computed in place.
+-- sha256() is built in from PostgreSQL 11. Refresh tokens live for a day, so on very
+-- large tables `TRUNCATE refresh_tokens` (every user logs in again) is a valid shortcut.
+
+BEGIN;
+
+ALTER TABLE refresh_tokens ADD COLUMN token_digest bytea;
+UPDATE refresh_tokens SET token_digest = sha256(convert_to(refresh_token, 'UTF8'));
+ALTER TABLE refresh_tokens ALTER COLUMN token_digest SET NOT NULL;
+ALTER TABLE refresh_tokens ADD CONSTRAINT refresh_tokens_token_digest_key UNIQUE (token_digest);
+ALTER TABLE refresh_tokens DROP COLUMN refresh_token;
+
+COMMIT;
+
+-- Outside the transaction so writes are not blocked while the indexes build.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_refresh_tokens_user ON refresh_tokens ("user");
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_refresh_tokens_active
+    ON refresh_tokens (expires_at) WHERE revoked IS false;
@@ -1,9 +1,19 @@
-from datetime import UTC, datetime
-
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
+from .util.dates import utcnow
 
 
 class User(Base):
@@ -13,8 +23,9 @@ class User(Base):
     last_name: Mapped[str] = mapped_column(String)
     email: Mapped[str] = mapped_column(String, unique=True, index=True)
     hashed_password: Mapped[str] = mapped_column(String)
+    # unused, refresh rate limiting moved to qftb.util.ratelimit
     refresh_limit: Mapped[int] = mapped_column(Integer, default=0)
-    last_accessed: Mapped[datetime] = mapped_column(DateTime, default=datetime.now(UTC))
+    last_accessed: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
     refresh_tokens = relationship("RefreshToken", back_populates="user")
 
 
@@ -31,10 +42,22 @@ class Admin(Base):
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column("user", Integer, ForeignKey(User.id), nullable=False)
-    refresh_token: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        "user", Integer, ForeignKey(User.id), nullable=False, index=True
+    )
+    # SHA-256 of the cookie value, see qftb.util.tokens.token_digest
+    token_digest: Mapped[bytes] = mapped_column(LargeBinary(32), unique=True, nullable=False)
     expires_at: Mapped[datetime] = mapped_column(
-        "expires_at", DateTime, nullable=False, default=datetime.now(UTC)
+        "expires_at", DateTime, nullable=False, default=utcnow
     )
     revoked: Mapped[bool] = mapped_column(Boolean, default=False)
     user: Mapped["User"] = relationship(back_populates="refresh_tokens")
+
+
+# Live tokens, expiry can't be in the predicate (now() is not immutable) so it is the key
+Index(
+    "ix_refresh_tokens_active",
+    RefreshToken.expires_at,
+    postgresql_where=RefreshToken.revoked.is_(False),
+    sqlite_where=RefreshToken.revoked.is_(False),
+)
@@ -1,17 +1,101 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+import tempfile
+from typing import Annotated, Literal
 
-from qftb import models
-from qftb.database import get_db
-from qftb.schemas import AdminUserView
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from qftb.config import settings
+from qftb.schemas import AdminUserView, ImportProgress
+from qftb.service.auth_service import AuthenticationManager
+from qftb.service.user_service import (
+    ADMIN_USER_ROWS,
+    DEFAULT_PAGE_SIZE,
+    MAX_IMPORT_BATCH_SIZE,
+    MAX_PAGE_SIZE,
+    NDJSON,
+    NEXT_CURSOR_HEADER,
+    UserService,
+)
+from qftb.util.imports import file_chunks, read_records
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+# import bodies above this many bytes are buffered in a temporary file
+IMPORT_SPOOL_SIZE = 1024 * 1024
+
 
-@router.get("/users", response_model=list[AdminUserView])
-def admin_read_users(db: Session = Depends(get_db)):
+@router.get(
+    "/users",
+    response_model=list[AdminUserView],
+    responses={200: {"content": {NDJSON: {}}}},
+)
+async def admin_read_users(
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    after: int | None = None,
+    output: Annotated[Literal["json", "ndjson"], Query(alias="format")] = "json",
+    user_service: UserService = Depends(UserService),
+):
     """
     GET all users - for ADMIN view
+
+    Keyset paginated like GET /user, `format=ndjson` streams the whole table.
+    """
+    if output == "ndjson":
+        return StreamingResponse(
+            user_service.stream_users(ADMIN_USER_ROWS, after), media_type=NDJSON
+        )
+    rows = await user_service.get_users_page(ADMIN_USER_ROWS, limit, after)
+    headers = {NEXT_CURSOR_HEADER: str(rows[-1].cursor)} if len(rows) == limit else None
+    # rows are encoded directly, response_model only documents the schema
+    return Response(ADMIN_USER_ROWS.dumps(rows), media_type="application/json", headers=headers)
+
+
+@router.post(
+    "/users/import",
+    response_model=ImportProgress,
+    responses={200: {"content": {NDJSON: {}}}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                NDJSON: {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def admin_import_users(
+    request: Request,
+    data_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+    batch_size: Annotated[
+        int, Query(ge=1, le=MAX_IMPORT_BATCH_SIZE)
+    ] = settings.USER_IMPORT_BATCH_SIZE,
+    auth_manager: AuthenticationManager = Depends(AuthenticationManager),
+    user_service: UserService = Depends(UserService),
+):
+    """
+    POST bulk create users - from allowed IP addresses only
+
+    The body holds one CreateUser object per line (`format=ndjson`) or a CSV with a
+    firstName,lastName,email,password header. The response streams one
+    ImportProgress line per committed batch: running totals plus the rows of that
+    batch that were skipped as conflicts or invalid. Use `qftb import-users` for
+    imports too large for a single request.
     """
-    users = db.query(models.User)
-    return users
+    auth_manager.restrict_ip_address(request)
+    # spooled to disk past IMPORT_SPOOL_SIZE instead of held in memory, and read
+    # before the response starts: a StreamingResponse may consume receive() itself
+    body = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE)
+    async for chunk in request.stream():
+        body.write(chunk)
+    body.seek(0)
+    batches = user_service.import_users(read_records(file_chunks(body), data_format), batch_size)
+
+    async def progress_lines():
+        try:
+            async for progress in batches:
+                yield progress.model_dump_json(by_alias=True) + "\n"
+        finally:
+            body.close()
+
+    return StreamingResponse(progress_lines(), media_type=NDJSON)
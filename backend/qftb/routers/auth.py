@@ -1,3 +1,4 @@
+import logging
 from datetime import timedelta
 from typing import Annotated
 
@@ -8,6 +9,9 @@ from fastapi.security import (
 
 from qftb.schemas import Message, Token
 from qftb.service.auth_service import AuthenticationManager
+from qftb.util.responses import model_response
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/auth",
@@ -17,11 +21,10 @@ router = APIRouter(
 
 
 @router.post("/login", response_model=Token, status_code=status.HTTP_200_OK)
-def login_user(
-    response: Response,
+async def login_user(
     credentials: Annotated[OAuth2PasswordRequestForm, Depends()],
     auth_manager: AuthenticationManager = Depends(AuthenticationManager),
-) -> Token:
+) -> Response:
     """
     Login user client
 
@@ -33,9 +36,11 @@ def login_user(
     - Token
     """
 
-    user_info = auth_manager.authenticate_user(credentials.username.lower(), credentials.password)
+    user_info, refresh_token = await auth_manager.login(
+        credentials.username.lower(), credentials.password
+    )
     access_token = auth_manager.generate_access_token(user_info, timedelta(minutes=15))
-    refresh_token = auth_manager.generate_refresh_token(user_info.id)
+    response = model_response(Token(access_token=access_token, token_type="bearer"))
     response.set_cookie(
         key="refreshToken",
         value=refresh_token,
@@ -45,12 +50,12 @@ def login_user(
         max_age=60 * 60 * 24,
         expires=60 * 60 * 24,
     )
-    print("Refresh token created")
-    return Token(access_token=access_token, token_type="bearer")
+    logger.info("Refresh token issued for user %s", user_info.id)
+    return response
 
 
 @router.post("/admin", status_code=status.HTTP_200_OK)
-def login_admin(
+async def login_admin(
     credentials: Annotated[OAuth2PasswordRequestForm, Depends()],
     auth_manager: AuthenticationManager = Depends(AuthenticationManager),
 ):
@@ -67,17 +72,16 @@ def login_admin(
     return True
 
 
-@router.get("/refresh")
-def user_valid_check(
-    response: Response,
+@router.get("/refresh", response_model=Token)
+async def user_valid_check(
     refreshToken: Annotated[str | None, Cookie()] = None,
     auth_manager: AuthenticationManager = Depends(AuthenticationManager),
-) -> Token:
+) -> Response:
     if refreshToken is None:
         raise HTTPException(status_code=401, detail="unauthenticated")
-    user_info = auth_manager.validate_refresh_session(refreshToken)
+    user_info, refresh_token = await auth_manager.rotate_refresh_token(refreshToken)
     access_token = auth_manager.generate_access_token(user_info, timedelta(minutes=15))
-    refresh_token = auth_manager.generate_refresh_token(user_info.id)
+    response = model_response(Token(access_token=access_token, token_type="bearer"))
     response.set_cookie(
         key="refreshToken",
         value=refresh_token,
@@ -88,13 +92,13 @@ def user_valid_check(
         expires=60 * 60 * 24,
     )
 
-    return Token(access_token=access_token, token_type="bearer")
+    return response
 
 
-@router.get("/logout")
-def invalidate_refresh(
+@router.get("/logout", response_model=Message)
+async def invalidate_refresh(
     refreshToken: Annotated[str, Cookie()],
     auth_manager: AuthenticationManager = Depends(AuthenticationManager),
-) -> Message:
-    refresh_user = auth_manager.invalidate_refresh_token(refreshToken)
-    return Message(detail=f"User {refresh_user} token revoked")
+) -> Response:
+    refresh_user = await auth_manager.invalidate_refresh_token(refreshToken)
+    return model_response(Message(detail=f"User {refresh_user} token revoked"))
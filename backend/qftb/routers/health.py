@@ -1,8 +1,64 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Request
+
+from qftb.database import async_engine, replicas
+from qftb.service.auth_service import AuthenticationManager, jwt_cache
+from qftb.service.token_filter import token_filter
+from qftb.service.token_reaper import reaper
+from qftb.service.user_service import user_cache
+from qftb.util.pool import pool_status
 
 router = APIRouter(prefix="/health", tags=["Health"])
 
 
+def internal_only(
+    request: Request, auth_manager: AuthenticationManager = Depends(AuthenticationManager)
+) -> None:
+    """
+    Internal stats are for clients from ALLOWED_IP_ADDRESSES, like the admin routes.
+    """
+    auth_manager.restrict_ip_address(request)
+
+
 @router.get("")
 async def health():
     return {"Status": "Healthy"}
+
+
+@router.get("/pool", include_in_schema=False, dependencies=[Depends(internal_only)])
+async def health_pool():
+    """
+    Internal view of the database connection pool for this worker
+    """
+    return pool_status(async_engine.pool)
+
+
+@router.get("/replicas", include_in_schema=False, dependencies=[Depends(internal_only)])
+async def health_replicas():
+    """
+    Read replicas and their last health check result for this worker
+    """
+    return replicas.status()
+
+
+@router.get("/reaper", include_in_schema=False, dependencies=[Depends(internal_only)])
+async def health_reaper():
+    """
+    Refresh token reaper counters for this worker
+    """
+    return reaper.stats
+
+
+@router.get("/token-filter", include_in_schema=False, dependencies=[Depends(internal_only)])
+async def health_token_filter():
+    """
+    Refresh token filter counters, size and false positive rates for this worker
+    """
+    return token_filter.status()
+
+
+@router.get("/caches", include_in_schema=False, dependencies=[Depends(internal_only)])
+async def health_caches():
+    """
+    In-process cache counters for this worker
+    """
+    return {"jwt": jwt_cache.stats(), "user": user_cache.stats()}
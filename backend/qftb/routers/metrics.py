@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Response
+
+from qftb.util.metrics import render
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus exposition, merged across workers in multiprocess mode
+    """
+    body, content_type = render()
+    return Response(body, media_type=content_type)
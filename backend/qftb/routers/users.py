@@ -1,10 +1,19 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, Header, status
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from fastapi.responses import StreamingResponse
 
 from qftb.schemas import CreateUser, ErrorResponse, Message, UserResponse
 from qftb.service.auth_service import AuthenticationManager
-from qftb.service.user_service import UserService
+from qftb.service.user_service import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NDJSON,
+    NEXT_CURSOR_HEADER,
+    USER_ROWS,
+    UserService,
+)
+from qftb.util.responses import etag_matches, model_response
 
 router = APIRouter(prefix="/user", tags=["User"])
 
@@ -14,21 +23,36 @@ router = APIRouter(prefix="/user", tags=["User"])
     response_model=list[UserResponse],
     summary="Retrieve all users",
     description="Non-sensitive view of user details",
+    responses={200: {"content": {NDJSON: {}}}},
 )
-def read_users_non_admin(user_service: UserService = Depends(UserService)):
+async def read_users_non_admin(
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    after: int | None = None,
+    output: Annotated[Literal["json", "ndjson"], Query(alias="format")] = "json",
+    user_service: UserService = Depends(UserService),
+):
     """
     Get all users
 
-    Returns a list of user objects containing non sensetive user data.
-    If no users are found, an empty list is returned.
+    Returns a page of user objects containing non sensetive user data, ordered by id.
+    If no users are found, an empty list is returned. A full page sets the
+    X-Next-Cursor header, pass it back as `after` for the next page.
 
     Parameters:
+    - limit: page size.
+    - after: id cursor from the previous page.
+    - format: `ndjson` streams every user after the cursor, one JSON object per line.
     - user_service: UserService class.
 
     Returns:
     - List[schemas.UserResponse]: A list of user objects containing user details.
     """
-    return user_service.get_all_users()
+    if output == "ndjson":
+        return StreamingResponse(user_service.stream_users(USER_ROWS, after), media_type=NDJSON)
+    rows = await user_service.get_users_page(USER_ROWS, limit, after)
+    headers = {NEXT_CURSOR_HEADER: str(rows[-1].cursor)} if len(rows) == limit else None
+    # rows are encoded directly, response_model only documents the schema
+    return Response(USER_ROWS.dumps(rows), media_type="application/json", headers=headers)
 
 
 @router.get(
@@ -36,20 +60,23 @@ def read_users_non_admin(user_service: UserService = Depends(UserService)):
     response_model=UserResponse,
     summary="Retrieve single user",
     description="",
-    responses={404: {"model": Message}},
+    responses={304: {"description": "Not Modified"}, 404: {"model": Message}},
 )
-def read_single_user_non_admin(
+async def read_single_user_non_admin(
     id: int,
     authorization: Annotated[str, Header()],
+    if_none_match: Annotated[str | None, Header()] = None,
     auth_manager: AuthenticationManager = Depends(AuthenticationManager),
     user_service: UserService = Depends(UserService),
-) -> UserResponse:
+) -> Response:
     """
     Get single user by ID
 
-    Returns a single user object containing non sensetive user data.
+    Returns a single user object containing non sensetive user data. Responses carry
+    an ETag, sending it back in If-None-Match returns 304 without a body.
 
     Parameters:
+    - if_none_match: ETag from a previous response.
     - db: The database session dependency.
 
     Returns:
@@ -57,7 +84,11 @@ def read_single_user_non_admin(
 
     """
     validated = auth_manager.decode_token(authorization)
-    return user_service.get_single_user(id)
+    user = await user_service.get_user_response(id)
+    headers = {"ETag": user.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, user.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(user.body, media_type="application/json", headers=headers)
 
 
 @router.post(
@@ -70,9 +101,9 @@ def read_single_user_non_admin(
         409: {"model": Message},
     },
 )
-def create_single_user(
+async def create_single_user(
     user_payload: CreateUser, user_service: UserService = Depends(UserService)
-) -> Message | None:
+) -> Response:
     """
     POST create a single user
 
@@ -83,4 +114,5 @@ def create_single_user(
     Returns:
     - {}: A user object containing success msg.
     """
-    return user_service.create_user(user_payload)
+    message = await user_service.create_user(user_payload)
+    return model_response(message, status_code=status.HTTP_201_CREATED)
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Response
+
+from qftb.config import settings
+from qftb.util.jwks import get_keyring
+
+router = APIRouter(prefix="/.well-known", tags=["Auth"])
+
+
+@router.get("/jwks.json")
+async def jwks(response: Response) -> dict:
+    """
+    Public keys for verifying access tokens
+
+    Empty when tokens are signed with a shared secret (HS*).
+    """
+    response.headers["Cache-Control"] = f"public, max-age={settings.JWKS_MAX_AGE}"
+    return get_keyring().jwks()
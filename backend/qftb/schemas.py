@@ -52,6 +52,24 @@ class AdminUserView(BaseSchema):
     hashed_password: str
 
 
+class ImportIssue(BaseSchema):
+    line: int
+    email: Optional[str] = None
+    detail: str
+
+
+class ImportProgress(BaseSchema):
+    """
+    Running totals of a bulk import, with the rows of the last batch that were skipped
+    """
+
+    received: int = 0
+    created: int = 0
+    conflicts: int = 0
+    invalid: int = 0
+    issues: List[ImportIssue] = []
+
+
 class Login(BaseModel):
     username: str
     password: str
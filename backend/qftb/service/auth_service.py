@@ -1,33 +1,54 @@
+import logging
 import secrets
-from datetime import UTC, datetime, timedelta, timezone
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
 
-import jwt
 from fastapi import Depends, HTTPException, Request, status
 from jwt.exceptions import InvalidTokenError
-from sqlalchemy import delete, select
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from qftb.config import settings
 from qftb.database import get_db
 from qftb.models import RefreshToken, User
 from qftb.schemas import JwtInfo, UserInfo
-from qftb.util.password import verify_password
+from qftb.service.token_filter import token_filter
+from qftb.util.cache import TTLCache
+from qftb.util.dates import utcnow
+from qftb.util.jwks import get_keyring
+from qftb.util.metrics import jwt_operations, logins, refresh_rotations
+from qftb.util.password import hash_async, needs_rehash, verify_password_async
+from qftb.util.ratelimit import RateLimiter, get_refresh_limiter
+from qftb.util.tokens import token_digest
+from qftb.util.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Verified access tokens by digest, entries expire with the token
+jwt_cache: TTLCache[bytes, JwtInfo] = TTLCache(settings.JWT_CACHE_SIZE)
 
 
 class AuthenticationManager:
-    def __init__(self, db: Session = Depends(get_db)):
+    def __init__(
+        self,
+        db: AsyncSession = Depends(get_db),
+        refresh_limiter: RateLimiter = Depends(get_refresh_limiter),
+    ):
         self.db = db
+        self.refresh_limiter = refresh_limiter
 
-    def authenticate_user(self, username: str, password: str) -> UserInfo:
+    async def authenticate_user(self, username: str, password: str) -> UserInfo:
         """
         Authenitcate User
 
         DB query for user.
         1. If present and password matches return username.
-        2. Check user refresh limit - if more than 1 minute since last access reset
+        2. Record last access, rehashing the password if the Argon2 parameters changed.
         3. Delete all previous rotated refresh tokens.
 
+        Changes are left in the open transaction, the caller commits.
+
         Parameters:
         - username: string
         - password: string
@@ -36,37 +57,76 @@ class AuthenticationManager:
         Returns:
         - UserInfo
         """
-        res = self.db.execute(select(User).where(User.email == username))
+        res = await self.db.execute(
+            select(User.id, User.email, User.hashed_password).where(User.email == username)
+        )
         try:
-            user = res.scalar_one()
+            user = res.one()
         except NoResultFound:
-            print("User not found")
+            logger.info("Login for unknown user")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
             )
 
-        if not verify_password(password, user.hashed_password):
+        try:
+            verified = await verify_password_async(password, user.hashed_password)
+        except BrokenProcessPool as err:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error"
+            ) from err
+        if not verified:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
             )
 
         user_info = UserInfo(id=user.id, username=user.email)
-        current_time = datetime.now(UTC)
-        # convert to timezone aware
-        last_accessed = user.last_accessed.replace(tzinfo=timezone.utc)
+        values = {"last_accessed": utcnow()}
         try:
-            if current_time - last_accessed > timedelta(minutes=1):
-                user.refresh_limit = 1
-                print(f"Reset user {username} refresh limit")
-            user.last_accessed = current_time
-            self.db.commit()
-            self.refresh_token_cleanup(user_info)
+            if needs_rehash(user.hashed_password):
+                # the plain password is only known here, migrate the hash lazily
+                values["hashed_password"] = await hash_async(password)
+            await self.db.execute(update(User).where(User.id == user.id).values(**values))
+            await self.refresh_token_cleanup(user_info)
             return user_info
-        except Exception as err:
-            self.db.rollback()
-            print(err)
+        except HTTPException:
+            raise
+        except Exception:
+            await self.db.rollback()
+            logger.exception("Login update failed for user %s", user.id)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error"
+            )
+
+    async def login(self, username: str, password: str) -> tuple[UserInfo, str]:
+        """
+        Login in a single transaction
+
+        User lookup, refresh limit update, token clean up and the new refresh token
+        insert are committed together.
+
+        Parameters:
+        - username: string
+        - password: string
+
+        Returns:
+        - UserInfo, refresh token
+        """
+        try:
+            user_info = await self.authenticate_user(username, password)
+        except HTTPException:
+            logins.labels("failure").inc()
+            raise
+        try:
+            refresh_token = await self.add_refresh_token(user_info.id)
+            await self.db.commit()
+            logins.labels("success").inc()
+            return user_info, refresh_token
+        except Exception:
+            logins.labels("error").inc()
+            await self.db.rollback()
+            logger.exception("Login failed for user %s", user_info.id)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error"
             )
@@ -85,45 +145,42 @@ class AuthenticationManager:
         encode = {"sub": user_info.username, "id": user_info.id}
         expires = datetime.now(timezone.utc) + expires_delta
         encode.update({"exp": expires})
-        return jwt.encode(encode, settings.JWT_SECRET_KEY, algorithm=settings.ALGO)
+        with tracer.start_as_current_span("jwt.encode"):
+            token = get_keyring().encode(encode)
+        jwt_operations.labels("sign", "ok").inc()
+        return token
 
-    def generate_refresh_token(self, user_id: int) -> str:
+    async def add_refresh_token(self, user_id: int) -> str:
         """
-        1. Generate opaque refresh token
-        2. Store refresh token in the refresh_tokens table.
-        3. Return refresh_token
+        INSERT a new opaque refresh token in the open transaction.
+
+        The token value is generated here, so nothing has to be read back.
 
         Parameters:
         - user_id: int
-        - db: Session
 
         Returns:
         - : String
         """
         refresh_token = secrets.token_urlsafe(40)
-        try:
-            token = RefreshToken(
+        digest = token_digest(refresh_token)
+        await token_filter.issue(digest)
+        await self.db.execute(
+            insert(RefreshToken).values(
                 user_id=user_id,
-                refresh_token=refresh_token,
-                expires_at=datetime.utcnow() + timedelta(days=1),
+                token_digest=digest,
+                expires_at=utcnow() + timedelta(days=1),
                 revoked=False,
             )
-            self.db.add(token)
-            self.db.commit()
-            self.db.refresh(token)
-            return refresh_token
-        except Exception as err:
-            self.db.rollback()
-            print(f"Refresh token creation failed.. {err}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Service Error"
-            )
+        )
+        return refresh_token
 
     def decode_token(self, authorization: str) -> JwtInfo:
         """
         Validate Token
 
-        Validting token on protected endpoints.
+        Validting token on protected endpoints. The signature is checked once per token,
+        later calls are served from jwt_cache until the token expires.
 
         Parameters:
         - user_info: username and id contained
@@ -134,93 +191,140 @@ class AuthenticationManager:
         - String
         """
         token = authorization.replace("Bearer ", "")
+        cache_key = token_digest(token)
+        cached = jwt_cache.get(cache_key)
+        if cached is not None:
+            jwt_operations.labels("verify", "cached").inc()
+            return cached
         try:
-            decoded = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.ALGO])
-            return JwtInfo(id=decoded["id"], sub=decoded["sub"], exp=decoded["exp"])
+            with tracer.start_as_current_span("jwt.decode"):
+                decoded = get_keyring().decode(token)
+            info = JwtInfo(id=decoded["id"], sub=decoded["sub"], exp=decoded["exp"])
+            jwt_cache.set(cache_key, info, expires_at=decoded["exp"])
+            jwt_operations.labels("verify", "ok").inc()
+            return info
         except InvalidTokenError:
+            jwt_operations.labels("verify", "invalid").inc()
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token",
                 headers={"WWW-Authenticate": "Bearer"},
             ) from None
 
-    def invalidate_refresh_token(self, refresh_token: str) -> int:
+    async def invalidate_refresh_token(self, refresh_token: str) -> int:
+        digest = token_digest(refresh_token)
+        if not token_filter.maybe_live(digest):
+            if digest in token_filter.revoked:
+                raise HTTPException(
+                    detail="Token already revoked", status_code=status.HTTP_401_UNAUTHORIZED
+                )
+            # unknown, or revoked or expired before the filter was built
+            raise HTTPException(detail="Token Not found", status_code=status.HTTP_404_NOT_FOUND)
         try:
-            res = self.db.execute(
-                select(RefreshToken).where(RefreshToken.refresh_token == refresh_token)
+            res = await self.db.execute(
+                select(RefreshToken).where(RefreshToken.token_digest == digest)
             )
             token = res.scalar_one()
 
             if token.revoked is True:
-                print("Token already revoked")
+                logger.info("Refresh token already revoked for user %s", token.user_id)
                 raise HTTPException(
                     detail="Token already revoked", status_code=status.HTTP_401_UNAUTHORIZED
                 )
 
             token.revoked = True
-            self.db.commit()
+            await self.db.commit()
+            await token_filter.revoke_committed(digest)
 
-            last_accessed = token.expires_at.replace(tzinfo=timezone.utc)
-            if last_accessed < datetime.now(timezone.utc):
+            if token.expires_at < utcnow():
                 raise HTTPException(detail="refresh token is expired", status_code=401)
-            print("Refresh token invalidated successfully")
+            logger.info("Refresh token revoked for user %s", token.user_id)
             return token.user_id
         except NoResultFound:
+            token_filter.false_positive()
             raise HTTPException(detail="Token Not found", status_code=status.HTTP_404_NOT_FOUND)
-        except Exception as err:
-            self.db.rollback()
-            print(f"Something went wrong with token Invaldation {err}")
+        except HTTPException:
+            raise
+        except Exception:
+            await self.db.rollback()
+            logger.exception("Refresh token invalidation failed")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error"
             )
 
-    def validate_refresh_session(self, refresh_token: str) -> UserInfo:
-        refresh_user = self.invalidate_refresh_token(refresh_token)
-        print(refresh_user)
-        try:
-            res = self.db.execute(select(User).where(User.id == refresh_user))
-            user = res.scalar_one()
-
-            current_time = datetime.now(UTC)
-            last_accessed = user.last_accessed.replace(tzinfo=timezone.utc)
-            if current_time - last_accessed < timedelta(minutes=1):
-                print("User refresh limit", user.refresh_limit)
-                user.refresh_limit += 1
-                if user.refresh_limit > 3:
-                    # TODO: do we revoke this token ???
-                    raise HTTPException(status_code=429, detail="Rate limit exceeded")
-            else:
-                # Reset count and update timestamp
-                user.refresh_limit = 1
-                print("User refresh limit reset", user.refresh_limit)
-                user.last_accessed = current_time
-
-            # Step 5: Commit rate limit tracking updates
-            user.last_accessed = current_time
-            self.db.commit()
-
-            return UserInfo(id=user.id, username=user.email)
-        except NoResultFound:
+    async def rotate_refresh_token(self, refresh_token: str) -> tuple[UserInfo, str]:
+        """
+        Rotate refresh token
+
+        Single transaction, safe under concurrent refreshes of the same cookie:
+        1. Conditional UPDATE revokes the token only if it is live, RETURNING the owner.
+           A concurrent rotation blocks on the row lock and then matches nothing.
+        2. Refresh rate limit per user, outside the database.
+        3. SELECT the user info and INSERT the new refresh token.
+
+        Tokens token_filter knows to be dead are rejected before any query.
+
+        Parameters:
+        - refresh_token: string
+
+        Returns:
+        - UserInfo, new refresh token
+        """
+        current_time = utcnow()
+        digest = token_digest(refresh_token)
+        if not token_filter.maybe_live(digest):
+            refresh_rotations.labels("invalid").inc()
             raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect username or password",
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
+            )
+        try:
+            res = await self.db.execute(
+                update(RefreshToken)
+                .where(
+                    RefreshToken.token_digest == digest,
+                    RefreshToken.revoked.is_(False),
+                    RefreshToken.expires_at > current_time,
+                )
+                .values(revoked=True)
+                .returning(RefreshToken.user_id)
+                .execution_options(synchronize_session=False)
             )
-        except HTTPException as http_err:
-            # Reraise known HTTP exceptions (like 401, 404, or 429) without modification
-            raise http_err
+            user_id = res.scalar_one_or_none()
+            if user_id is None:
+                token_filter.false_positive()
+                refresh_rotations.labels("invalid").inc()
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
+                )
+
+            if not await self.refresh_limiter.hit(str(user_id)):
+                refresh_rotations.labels("rate_limited").inc()
+                # rolled back below, the presented token stays valid after the window
+                raise HTTPException(status_code=429, detail="Rate limit exceeded")
+
+            res = await self.db.execute(select(User.id, User.email).where(User.id == user_id))
+            user = res.one()
+            new_token = await self.add_refresh_token(user.id)
+            await self.db.commit()
+            await token_filter.revoke_committed(digest)
+            refresh_rotations.labels("success").inc()
+            return UserInfo(id=user.id, username=user.email), new_token
+        except HTTPException:
+            await self.db.rollback()
+            raise
         except Exception as err:
-            self.db.rollback()
-            print(err)
+            refresh_rotations.labels("error").inc()
+            await self.db.rollback()
+            logger.exception("Refresh token rotation failed")
             raise HTTPException(status_code=500, detail="Internal server error") from err
 
-    def refresh_token_cleanup(self, user_info: UserInfo) -> None:
+    async def refresh_token_cleanup(self, user_info: UserInfo) -> None:
         try:
-            self.db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_info.id))
-            self.db.commit()
-            print(f"Token clean up for user {user_info.username}")
-        except Exception as err:
-            self.db.rollback()
-            print(err)
+            await self.db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_info.id))
+            logger.info("Refresh tokens cleared for user %s", user_info.id)
+        except Exception:
+            await self.db.rollback()
+            logger.exception("Refresh token clean up failed for user %s", user_info.id)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error"
             )
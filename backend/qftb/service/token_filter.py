@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from qftb.config import settings
+from qftb.database import AsyncSessionLocal
+from qftb.models import RefreshToken
+from qftb.util.bloom import BloomFilter
+from qftb.util.dates import utcnow
+from qftb.util.invalidation import (
+    InvalidationChannel,
+    LocalInvalidationChannel,
+    RedisInvalidationChannel,
+)
+from qftb.util.metrics import refresh_filter_checks
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a rebuild's snapshot in which an issued token may still have been
+# uncommitted, such tokens are carried over into the new filter
+REBUILD_MARGIN = 60
+# rows per fetch, filling the filter blocks the event loop for about a batch
+REBUILD_BATCH_SIZE = 1000
+# a dropped connection is usually back at once
+PUBLISH_ATTEMPTS = 3
+PUBLISH_RETRY_DELAY = 0.05
+
+
+@dataclass
+class FilterStats:
+    rejected: int = 0
+    passed: int = 0
+    # passed the filter, but the database found no live token
+    false_positives: int = 0
+    rebuilds: int = 0
+
+
+@lru_cache
+def get_filter_channel() -> InvalidationChannel:
+    """
+    Issued and revoked digests for the other workers, one channel per process.
+    """
+    if settings.REFRESH_FILTER == "redis":
+        return RedisInvalidationChannel(settings.REDIS_URL, "qftb:refresh-filter")
+    return LocalInvalidationChannel()
+
+
+class RefreshTokenFilter:
+    """
+    Answers "is this refresh token certainly dead?" without a query.
+
+    A Bloom filter of live token digests, rebuilt from refresh_tokens at startup and
+    every `interval` seconds, plus the exact digests revoked since the last rebuild.
+    A digest missing from the filter was never issued, or was revoked or expired
+    before the rebuild; a revoked digest was rotated or logged out since. Anything
+    else may be live and goes to the database, which decides.
+
+    Every worker must see every issued token, or it would reject a valid one:
+    "local" is for a single process, "redis" shares issued and revoked digests over
+    pub/sub. Until a filter is built, and from the moment the channel may drop
+    messages until it is back and the filter rebuilt, every token passes.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.REFRESH_FILTER != "off",
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        capacity: int = settings.REFRESH_FILTER_CAPACITY,
+        error_rate: float = settings.REFRESH_FILTER_ERROR_RATE,
+        interval: float = settings.REFRESH_FILTER_REBUILD_INTERVAL,
+    ):
+        self.enabled = enabled
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.interval = interval
+        self.live: BloomFilter | None = None
+        self.revoked: dict[bytes, float] = {}
+        # (monotonic time, digest) of recently issued tokens, see REBUILD_MARGIN
+        self.issued: deque[tuple[float, bytes]] = deque()
+        self.rebuilding = False
+        # bumped by reset() and lost(), a rebuild that overlapped one is discarded
+        self.generation = 0
+        # listening on the channel, rebuilding is pointless otherwise
+        self.subscribed = False
+        self.stale: asyncio.Event | None = None
+        self.stats = FilterStats()
+
+    def maybe_live(self, digest: bytes) -> bool:
+        if self.live is None:
+            return True
+        if digest in self.revoked or digest not in self.live:
+            self.stats.rejected += 1
+            refresh_filter_checks.labels("rejected").inc()
+            return False
+        self.stats.passed += 1
+        refresh_filter_checks.labels("passed").inc()
+        return True
+
+    def false_positive(self) -> None:
+        """
+        A digest that passed was not live after all.
+        """
+        if self.live is not None:
+            self.stats.false_positives += 1
+            refresh_filter_checks.labels("false_positive").inc()
+
+    def add(self, digest: bytes) -> None:
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if not self.rebuilding:
+            while self.issued and self.issued[0][0] < now - REBUILD_MARGIN:
+                self.issued.popleft()
+        self.issued.append((now, digest))
+        if self.live is not None:
+            self.live.add(digest)
+
+    def revoke(self, digest: bytes) -> None:
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        # older digests are in the last rebuild, or the one that should have been by
+        # now if the channel is down; dropping one only costs a query
+        expired = now - self.interval - REBUILD_MARGIN
+        while self.revoked:
+            oldest = next(iter(self.revoked))
+            if self.revoked[oldest] >= expired:
+                break
+            del self.revoked[oldest]
+        # kept in revocation order
+        self.revoked.pop(digest, None)
+        self.revoked[digest] = now
+
+    async def issue(self, digest: bytes) -> None:
+        """
+        Add a token about to be committed, here and on every other worker. Published
+        before the commit, so no worker can see the token before its digest. Raises
+        when publishing fails: the others would reject the token, it must not be
+        committed.
+        """
+        if not self.enabled:
+            return
+        self.add(digest)
+        await self._publish("+", digest)
+
+    async def revoke_committed(self, digest: bytes) -> None:
+        if not self.enabled:
+            return
+        self.revoke(digest)
+        try:
+            await self._publish("-", digest)
+        except Exception as err:
+            # the other workers only miss a rejection, the database refuses the token
+            logger.warning("Refresh filter publish failed: %s", err)
+
+    async def _publish(self, op: str, digest: bytes) -> None:
+        message = op + digest.hex()
+        for _ in range(PUBLISH_ATTEMPTS - 1):
+            try:
+                return await get_filter_channel().publish(message)
+            except Exception as err:
+                logger.warning("Refresh filter publish failed, retrying: %s", err)
+            await asyncio.sleep(PUBLISH_RETRY_DELAY)
+        await get_filter_channel().publish(message)
+
+    def receive(self, message: str) -> None:
+        digest = bytes.fromhex(message[1:])
+        if message[0] == "+":
+            self.add(digest)
+        else:
+            self.revoke(digest)
+
+    def reset(self) -> None:
+        """
+        (Re)subscribed, messages may have been missed: stop rejecting until the next
+        rebuild, which starts now.
+        """
+        self.subscribed = True
+        self._fail_open()
+        if self.stale is not None:
+            self.stale.set()
+
+    def lost(self) -> None:
+        """
+        Unsubscribed, messages are being missed: stop rejecting until reset.
+        """
+        self.subscribed = False
+        self._fail_open()
+
+    def _fail_open(self) -> None:
+        self.live = None
+        self.generation += 1
+
+    async def rebuild(self) -> None:
+        """
+        Load the digests of live tokens into a new filter sized for twice their count,
+        then swap it in.
+        """
+        start = time.monotonic()
+        generation = self.generation
+        live = RefreshToken.revoked.is_(False) & (RefreshToken.expires_at > utcnow())
+        self.rebuilding = True
+        try:
+            async with self.session_factory() as db:
+                count = await db.scalar(select(func.count()).where(live))
+                bloom = BloomFilter(max(self.capacity, count * 2), self.error_rate)
+                stmt = (
+                    select(RefreshToken.token_digest)
+                    .where(live)
+                    .execution_options(yield_per=REBUILD_BATCH_SIZE)
+                )
+                async for digest in await db.stream_scalars(stmt):
+                    bloom.add(digest)
+            cutoff = start - REBUILD_MARGIN
+            for issued_at, digest in self.issued:
+                if issued_at >= cutoff:
+                    bloom.add(digest)
+            # revoked earlier means committed before the snapshot, so not in it
+            self.revoked = {d: t for d, t in self.revoked.items() if t >= cutoff}
+            if generation != self.generation:
+                logger.info("Refresh filter reset during rebuild, rebuilding again")
+                return
+            self.live = bloom
+        finally:
+            self.rebuilding = False
+        self.stats.rebuilds += 1
+        logger.info(
+            "Refresh filter rebuilt with %d tokens in %.2f s", count, time.monotonic() - start
+        )
+
+    async def run_forever(self) -> None:
+        """
+        Rebuild once subscribed, then every interval or when reset, for the app
+        lifetime.
+        """
+        if not self.enabled:
+            return
+        if settings.REFRESH_FILTER == "local":
+            logger.warning(
+                "REFRESH_FILTER=local: this must be the only process issuing refresh"
+                " tokens, any other would have its tokens rejected here"
+            )
+        self.stale = asyncio.Event()
+        listener = asyncio.create_task(
+            get_filter_channel().listen(self.receive, self.reset, self.lost)
+        )
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self.stale.wait(), self.interval)
+                except TimeoutError:
+                    pass
+                self.stale.clear()
+                if not self.subscribed:
+                    continue
+                try:
+                    await self.rebuild()
+                except Exception:
+                    logger.exception("Refresh filter rebuild failed")
+        finally:
+            listener.cancel()
+
+    def status(self) -> dict:
+        checks = self.stats.passed + self.stats.rejected
+        return {
+            "enabled": self.enabled,
+            "ready": self.live is not None,
+            "subscribed": self.subscribed,
+            **vars(self.stats),
+            "reject_rate": self.stats.rejected / checks if checks else 0.0,
+            "observed_false_positive_rate": (
+                self.stats.false_positives / self.stats.passed if self.stats.passed else 0.0
+            ),
+            "revoked": len(self.revoked),
+            "live": self.live.stats() if self.live is not None else None,
+        }
+
+
+token_filter = RefreshTokenFilter()
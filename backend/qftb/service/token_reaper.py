@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from qftb.config import settings
+from qftb.database import AsyncSessionLocal
+from qftb.models import RefreshToken
+from qftb.util.dates import utcnow
+from qftb.util.metrics import refresh_tokens_reaped
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReaperStats:
+    runs: int = 0
+    batches: int = 0
+    rows_reclaimed: int = 0
+    last_run_rows: int = 0
+    last_run_at: datetime | None = None
+
+
+class TokenReaper:
+    """
+    Deletes expired and revoked refresh tokens in small batches.
+
+    Each batch is its own short transaction and skips rows locked by a concurrent
+    rotation, so the hot table is never locked for long and several workers can
+    run a reaper at the same time.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        batch_size: int = settings.TOKEN_REAPER_BATCH_SIZE,
+        interval: float = settings.TOKEN_REAPER_INTERVAL,
+        batch_pause: float = settings.TOKEN_REAPER_BATCH_PAUSE,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self.batch_pause = batch_pause
+        self.stats = ReaperStats()
+
+    async def reap_batch(self) -> int:
+        dead = (
+            select(RefreshToken.id)
+            .where(or_(RefreshToken.revoked.is_(True), RefreshToken.expires_at < utcnow()))
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with self.session_factory() as db:
+            res = await db.execute(
+                delete(RefreshToken)
+                .where(RefreshToken.id.in_(dead.scalar_subquery()))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        self.stats.batches += 1
+        return res.rowcount
+
+    async def reap_once(self) -> int:
+        """
+        Reap until a batch comes back short, pausing between batches.
+        """
+        total = 0
+        while True:
+            deleted = await self.reap_batch()
+            total += deleted
+            self.stats.rows_reclaimed += deleted
+            refresh_tokens_reaped.inc(deleted)
+            if deleted < self.batch_size:
+                break
+            await asyncio.sleep(self.batch_pause)
+        self.stats.runs += 1
+        self.stats.last_run_rows = total
+        self.stats.last_run_at = utcnow()
+        logger.info("Token reaper reclaimed %d rows", total)
+        return total
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await self.reap_once()
+            except Exception:
+                logger.exception("Token reaper run failed")
+            await asyncio.sleep(self.interval)
+
+
+reaper = TokenReaper()
@@ -1,32 +1,118 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Sequence
+
 import sqlalchemy.exc
 from fastapi import Depends, HTTPException, status
-from psycopg2.errors import UniqueViolation
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy import Row, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from qftb.database import get_db
+from qftb.config import settings
+from qftb.database import get_db, get_read_db
 from qftb.models import User
-from qftb.schemas import CreateUser, Message
-from qftb.util.password import hash
+from qftb.schemas import (
+    AdminUserView,
+    CreateUser,
+    ImportIssue,
+    ImportProgress,
+    Message,
+    UserResponse,
+)
+from qftb.util.cache import TTLCache
+from qftb.util.imports import chunked
+from qftb.util.invalidation import get_user_invalidation
+from qftb.util.password import hash_async
+from qftb.util.responses import etag
+from qftb.util.rows import RowEncoder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 1000
+MAX_IMPORT_BATCH_SIZE = 10_000
+NDJSON = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# INSERT ... ON CONFLICT DO NOTHING per dialect, the unique email index arbitrates
+INSERT_IGNORING = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+CONFLICT_DETAIL = "User already exists"
+
+# listing projections, built once
+USER_ROWS = RowEncoder(User, UserResponse, cursor=User.id)
+ADMIN_USER_ROWS = RowEncoder(User, AdminUserView, cursor=User.id)
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    body: bytes
+    etag: str
+
+
+# Serialized GET /user/{id} responses by user id
+user_cache: TTLCache[int, CachedUser] = TTLCache(settings.USER_CACHE_SIZE)
+
+
+async def listen_user_invalidations() -> None:
+    """
+    Drop entries other workers wrote, runs for the app lifetime.
+    """
+    await get_user_invalidation().listen(lambda key: user_cache.pop(int(key)), user_cache.clear)
 
 
 class UserService:
-    def __init__(self, db: Session = Depends(get_db)):
+    def __init__(
+        self,
+        db: AsyncSession = Depends(get_db),
+        read_db: AsyncSession = Depends(get_read_db),
+    ):
+        # writes and the email probe before a signup use the primary, listings and
+        # lookups may be served by a replica
         self.db = db
+        self.read_db = read_db
 
-    def get_all_users(self) -> list[User]:
+    async def get_users_page(
+        self, encoder: RowEncoder, limit: int, after: int | None = None
+    ) -> Sequence[Row]:
+        """
+        Keyset page of projected rows ordered by id, `after` is the last id of the
+        previous page.
+        """
+        stmt = encoder.select().limit(limit)
+        if after is not None:
+            stmt = stmt.where(User.id > after)
         try:
-            users = self.db.execute(select(User)).scalars().all()
-            return list(users)
+            return (await self.read_db.execute(stmt)).all()
         except Exception as err:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Internal server error",
             ) from err
 
-    def get_single_user(self, user_id: int) -> User:
+    async def stream_users(
+        self, encoder: RowEncoder, after: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """
+        NDJSON line per user through a server-side cursor, memory stays flat.
+
+        Uses its own session on the read session's engine: the request session may be
+        closed before a streamed body is sent.
+        """
+        stmt = encoder.select().execution_options(yield_per=STREAM_BATCH_SIZE)
+        if after is not None:
+            stmt = stmt.where(User.id > after)
+        async with AsyncSession(self.read_db.bind) as db:
+            async for row in await db.stream(stmt):
+                yield encoder.dumps_line(row)
+
+    async def get_single_user(self, user_id: int) -> User:
         try:
-            user = self.db.execute(select(User).where(User.id == user_id)).scalar_one()
+            stmt = select(User).where(User.id == user_id)
+            user = (await self.read_db.execute(stmt)).scalar_one()
             return user
         except sqlalchemy.exc.NoResultFound as err:
             raise HTTPException(
@@ -34,26 +120,158 @@ class UserService:
                 detail="Resource not found",
             ) from err
 
-    def create_user(self, user_payload: CreateUser) -> Message | None:
+    async def get_user_response(self, user_id: int) -> CachedUser:
+        """
+        Read-through: serialized UserResponse and its ETag, from user_cache when
+        present.
+        """
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return cached
+        user = await self.get_single_user(user_id)
+        body = UserResponse.model_validate(user).model_dump_json(by_alias=True).encode()
+        cached = CachedUser(body, etag(body))
+        user_cache.set(user_id, cached, expires_at=time.time() + settings.USER_CACHE_TTL)
+        return cached
+
+    async def invalidate_user(self, user_id: int) -> None:
+        """
+        Drop a written user here and, when configured, on every other worker.
+        """
+        user_cache.pop(user_id)
+        try:
+            await get_user_invalidation().publish(str(user_id))
+        except Exception as err:
+            # the write already committed, other workers catch up within the TTL
+            logger.warning("User cache invalidation failed for %s: %s", user_id, err)
+
+    async def email_exists(self, email: str) -> bool:
+        """
+        Probe the unique email index, selecting only the indexed column so Postgres
+        can answer with an index-only scan.
+        """
+        return await self.db.scalar(select(User.email).where(User.email == email)) is not None
+
+    async def create_user(self, user_payload: CreateUser) -> Message | None:
+        email = user_payload.email.lower()
+        # refuse known emails before paying for Argon2, the unique constraint below
+        # still decides concurrent signups
+        if await self.email_exists(email):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=CONFLICT_DETAIL)
         try:
             user_insert = User(
                 first_name=user_payload.first_name.lower(),
                 last_name=user_payload.last_name.lower(),
-                email=user_payload.email.lower(),
-                hashed_password=hash(user_payload.password),
+                email=email,
+                hashed_password=await hash_async(user_payload.password),
             )
             self.db.add(user_insert)
-            self.db.commit()
-            self.db.refresh(user_insert)
+            await self.db.commit()
+            # ids can be reused after a delete
+            await self.invalidate_user(user_insert.id)
             return Message(detail="User created successfully")
         except sqlalchemy.exc.IntegrityError as err:
-            if isinstance(err.orig, UniqueViolation):
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT, detail="User already exists"
-                ) from err
+            # email is the only unique column, driver agnostic unlike psycopg2's UniqueViolation
+            await self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail=CONFLICT_DETAIL
+            ) from err
         except Exception as err:
-            self.db.rollback()
+            await self.db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create user",
             ) from err
+
+    async def import_users(
+        self,
+        records: AsyncIterable[tuple[int, Any]],
+        batch_size: int = settings.USER_IMPORT_BATCH_SIZE,
+    ) -> AsyncIterator[ImportProgress]:
+        """
+        Bulk create users from (line number, record) pairs, one ImportProgress per batch.
+
+        1. Validate every record with CreateUser.
+        2. Report emails that already exist, or repeat within the batch, as conflicts
+           before hashing anything.
+        3. Hash the rest concurrently in the password process pool.
+        4. executemany INSERT ... ON CONFLICT DO NOTHING RETURNING, then commit.
+
+        Batches commit independently, so re-running an interrupted import only hashes
+        and inserts what is missing. Uses its own session on the same engine, like
+        stream_users.
+        """
+        received = created = conflicts = invalid = 0
+        insert_ignoring = INSERT_IGNORING[self.db.bind.dialect.name]
+        async with AsyncSession(self.db.bind, expire_on_commit=False) as db:
+            async for batch in chunked(records, batch_size):
+                received += len(batch)
+                issues = []
+                users: dict[str, tuple[int, CreateUser]] = {}
+                for line, record in batch:
+                    try:
+                        if isinstance(record, Exception):
+                            raise record
+                        payload = CreateUser.model_validate(record)
+                    except ValueError as err:
+                        invalid += 1
+                        issues.append(ImportIssue(line=line, detail=import_error_detail(err)))
+                        continue
+                    email = payload.email.lower()
+                    if email in users:
+                        conflicts += 1
+                        issues.append(ImportIssue(line=line, email=email, detail=CONFLICT_DETAIL))
+                        continue
+                    users[email] = (line, payload)
+
+                if users:
+                    existing = await db.scalars(select(User.email).where(User.email.in_(users)))
+                    for email in existing:
+                        line, _ = users.pop(email)
+                        conflicts += 1
+                        issues.append(ImportIssue(line=line, email=email, detail=CONFLICT_DETAIL))
+
+                if users:
+                    hashed_passwords = await asyncio.gather(
+                        *(hash_async(payload.password) for _, payload in users.values())
+                    )
+                    rows = [
+                        {
+                            "first_name": payload.first_name.lower(),
+                            "last_name": payload.last_name.lower(),
+                            "email": email,
+                            "hashed_password": hashed_password,
+                        }
+                        for (email, (_, payload)), hashed_password in zip(
+                            users.items(), hashed_passwords
+                        )
+                    ]
+                    stmt = insert_ignoring(User).on_conflict_do_nothing(index_elements=[User.email])
+                    inserted = (await db.execute(stmt.returning(User.id, User.email), rows)).all()
+                    await db.commit()
+
+                    created += len(inserted)
+                    # new ids, nothing cached to invalidate
+                    for user in inserted:
+                        users.pop(user.email)
+                    # lost a race with a concurrent insert
+                    for email, (line, _) in users.items():
+                        conflicts += 1
+                        issues.append(ImportIssue(line=line, email=email, detail=CONFLICT_DETAIL))
+
+                issues.sort(key=lambda issue: issue.line)
+                yield ImportProgress(
+                    received=received,
+                    created=created,
+                    conflicts=conflicts,
+                    invalid=invalid,
+                    issues=issues,
+                )
+
+
+def import_error_detail(err: ValueError) -> str:
+    if isinstance(err, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in err.errors()
+        )
+    return str(err)
@@ -0,0 +1,53 @@
+import math
+
+
+class BloomFilter:
+    """
+    Set membership in about 1.2 bytes per item at a 1% false positive rate: a miss
+    is certain, a hit is probable. Items are uniformly distributed bytes of at
+    least 16 bytes, such as SHA-256 digests, so their own bits index the filter
+    (double hashing) instead of hashing them again.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: bytes):
+        h1 = int.from_bytes(item[:8], "little")
+        h2 = int.from_bytes(item[8:16], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: bytes) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: bytes) -> bool:
+        bits = self.bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item)
+        )
+
+    def false_positive_rate(self) -> float:
+        """
+        Estimated from the share of bits set, which also accounts for repeated adds.
+        """
+        filled = int.from_bytes(self.bits, "little").bit_count() / self.size
+        return filled**self.hashes
+
+    def stats(self) -> dict:
+        return {
+            "items": self.count,
+            "capacity": self.capacity,
+            "bits": self.size,
+            "hashes": self.hashes,
+            "memory_bytes": len(self.bits),
+            "false_positive_rate": self.false_positive_rate(),
+        }
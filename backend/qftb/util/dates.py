@@ -0,0 +1,8 @@
+from datetime import UTC, datetime
+
+
+def utcnow() -> datetime:
+    """
+    Naive UTC now, matches the timezone-less DateTime columns.
+    """
+    return datetime.now(UTC).replace(tzinfo=None)
@@ -0,0 +1,168 @@
+import csv
+import json
+from collections import deque
+from typing import Any, AsyncIterable, AsyncIterator, BinaryIO, TypeVar
+
+T = TypeVar("T")
+
+IMPORT_FORMATS = ("ndjson", "csv")
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+async def file_chunks(file: BinaryIO, size: int = FILE_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    A binary file as the byte chunks read_records takes.
+    """
+    while chunk := file.read(size):
+        yield chunk
+
+
+async def split_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Lines of a byte stream, with their line ending, holding at most one line in
+    memory. A UTF-8 multi-byte sequence never contains b"\\n", so bytes split safely.
+    """
+    pending = bytearray()
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            pending += chunk[start : end + 1]
+            yield bytes(pending)
+            pending.clear()
+            start = end + 1
+        pending += chunk[start:]
+    if pending:
+        yield bytes(pending)
+
+
+async def read_records(chunks: AsyncIterable[bytes], fmt: str) -> AsyncIterator[tuple[int, Any]]:
+    """
+    (line number, record) per row of a UTF-8 NDJSON or CSV (with header) import,
+    read from a byte stream as it arrives.
+
+    A row that cannot be decoded or parsed yields a ValueError instead of a dict, so
+    one bad line does not stop the import. Blank lines are skipped.
+    """
+    records = _read_csv if fmt == "csv" else _read_ndjson
+    async for record in records(split_lines(chunks)):
+        yield record
+
+
+async def _read_ndjson(lines: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, Any]]:
+    line_num = 0
+    async for raw in lines:
+        line_num += 1
+        try:
+            line = raw.decode()
+            if not line.strip():
+                continue
+            yield line_num, json.loads(line)
+        except ValueError as err:
+            yield line_num, err
+
+
+async def _read_csv(lines: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, Any]]:
+    # one reader parses every record; it only gets a record's lines once they are all
+    # here, since it cannot wait for the next chunk in the middle of one
+    fed: deque[str] = deque()
+    reader = csv.reader(_Lines(fed))
+    header: list[str] | None = None
+    pending: list[str] = []
+    quoted = False
+    # lines never given to the reader, which does not count them in line_num
+    skipped = 0
+    async for raw in lines:
+        try:
+            line = raw.decode()
+        except UnicodeDecodeError as err:
+            skipped += len(pending) + 1
+            yield reader.line_num + skipped, err
+            pending, quoted = [], False
+            continue
+        pending.append(line)
+        quoted = _ends_quoted(line, quoted)
+        if quoted:
+            continue
+        fed.extend(pending)
+        pending = []
+        try:
+            row = next(reader)
+        except csv.Error as err:
+            skipped += len(fed)
+            fed.clear()
+            yield reader.line_num + skipped, ValueError(f"CSV: {err}")
+            continue
+        if not row:
+            continue
+        if header is None:
+            header = row
+            continue
+        yield reader.line_num + skipped, _csv_row(header, row)
+    if pending:
+        yield reader.line_num + skipped + len(pending), ValueError("CSV: unexpected end of data")
+
+
+class _Lines:
+    """
+    Iterator over the lines in `fed`, which grows as records arrive.
+    """
+
+    def __init__(self, fed: deque[str]):
+        self.fed = fed
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.fed:
+            raise StopIteration
+        return self.fed.popleft()
+
+
+def _ends_quoted(line: str, quoted: bool) -> bool:
+    """
+    Whether a quoted field is still open after line, by the rules of the default
+    dialect: a quote opens a field only at its start and is literal anywhere else in
+    an unquoted field, "" is a quote inside a quoted field.
+    """
+    if not quoted and '"' not in line:
+        return False
+    field_start = not quoted
+    i = 0
+    while i < len(line):
+        c = line[i]
+        if quoted:
+            if c == '"':
+                if line.startswith('"', i + 1):
+                    i += 1
+                else:
+                    quoted = False
+        elif c == '"' and field_start:
+            quoted = True
+        field_start = c == "," and not quoted
+        i += 1
+    return quoted
+
+
+def _csv_row(header: list[str], row: list[str]) -> dict:
+    # like csv.DictReader: missing fields are None, extra fields go under None
+    values: dict = dict(zip(header, row))
+    for name in header[len(row) :]:
+        values[name] = None
+    if len(row) > len(header):
+        values[None] = row[len(header) :]
+    return values
+
+
+async def chunked(items: AsyncIterable[T], size: int) -> AsyncIterator[list[T]]:
+    """
+    Lists of up to size items, without reading ahead.
+    """
+    chunk: list[T] = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
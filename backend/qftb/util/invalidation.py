@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Callable
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidationChannel(ABC):
+    """
+    Tells every worker to drop a cached key after a write.
+    """
+
+    @abstractmethod
+    async def publish(self, key: str) -> None:
+        """
+        Announce that key changed, the publisher drops its own entry itself.
+        """
+
+    @abstractmethod
+    async def listen(
+        self,
+        drop: Callable[[str], None],
+        reset: Callable[[], None],
+        lost: Callable[[], None] | None = None,
+    ) -> None:
+        """
+        Call drop for every announced key until cancelled. reset is called once
+        subscribed, whenever messages may have been missed before; lost as soon as
+        messages may be missed, until the next reset.
+        """
+
+
+class LocalInvalidationChannel(InvalidationChannel):
+    """
+    Single worker or TTL-bounded staleness: nothing to send or receive.
+    """
+
+    async def publish(self, key: str) -> None:
+        return None
+
+    async def listen(
+        self,
+        drop: Callable[[str], None],
+        reset: Callable[[], None],
+        lost: Callable[[], None] | None = None,
+    ) -> None:
+        # nothing can be missed
+        reset()
+
+
+class RedisInvalidationChannel(InvalidationChannel):
+    """
+    Pub/sub over a Redis-protocol server. Delivery is at most once, so a
+    reconnecting subscriber resets its cache instead of trusting it.
+    """
+
+    def __init__(self, url: str, channel: str, retry_delay: float = 1.0):
+        # optional dependency, only needed for this backend
+        import redis.asyncio
+
+        self.redis = redis.asyncio.from_url(url)
+        self.channel = channel
+        self.retry_delay = retry_delay
+
+    async def publish(self, key: str) -> None:
+        await self.redis.publish(self.channel, key)
+
+    async def listen(
+        self,
+        drop: Callable[[str], None],
+        reset: Callable[[], None],
+        lost: Callable[[], None] | None = None,
+    ) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    reset()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            drop(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                logger.warning("Invalidation channel %s lost: %s", self.channel, err)
+                if lost is not None:
+                    lost()
+                await asyncio.sleep(self.retry_delay)
+                continue
+            if lost is not None:
+                lost()
+
+
+@lru_cache
+def get_user_invalidation() -> InvalidationChannel:
+    """
+    User cache invalidation channel for the configured backend, one per process.
+    """
+    if settings.USER_CACHE_INVALIDATION == "redis":
+        return RedisInvalidationChannel(settings.REDIS_URL, "qftb:invalidate:users")
+    return LocalInvalidationChannel()
@@ -0,0 +1,127 @@
+import base64
+import hashlib
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+from jwt.exceptions import InvalidTokenError
+
+from ..config import settings
+
+# JWK members that identify a key, RFC 7638
+THUMBPRINT_MEMBERS = {
+    "RSA": ("e", "kty", "n"),
+    "EC": ("crv", "kty", "x", "y"),
+    "OKP": ("crv", "kty", "x"),
+}
+
+EC_ALGORITHMS = {"secp256r1": "ES256", "secp384r1": "ES384", "secp521r1": "ES512"}
+
+
+@dataclass(frozen=True)
+class VerificationKey:
+    kid: str | None
+    algorithm: str
+    key: Any
+    jwk: dict | None
+
+
+def thumbprint(jwk: dict) -> str:
+    members = {name: jwk[name] for name in THUMBPRINT_MEMBERS[jwk["kty"]]}
+    digest = hashlib.sha256(json.dumps(members, separators=(",", ":")).encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def key_algorithm(public_key: Any) -> str:
+    """
+    JWS algorithm for a verification-only public key (RSA keys are taken as RS256).
+    """
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return "RS256"
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        return EC_ALGORITHMS[public_key.curve.name]
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        return "EdDSA"
+    raise ValueError(f"Unsupported JWT key type {type(public_key).__name__}")
+
+
+def verification_key(algorithm: str, public_key: Any) -> VerificationKey:
+    jwk = get_default_algorithms()[algorithm].to_jwk(public_key, as_dict=True)
+    jwk.update(kid=thumbprint(jwk), alg=algorithm, use="sig")
+    return VerificationKey(jwk["kid"], algorithm, public_key, jwk)
+
+
+class KeyRing:
+    """
+    Signing key plus every key tokens may still be verified with.
+
+    Asymmetric keys get their RFC 7638 thumbprint as `kid` and are published as JWKS,
+    so other services verify tokens locally. Rotation: sign with the new key and keep
+    the old public key in `retired_keys` for at least the access token lifetime plus
+    the JWKS max-age. Listing the next key there ahead of time lets consumers cache
+    it before the switch.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        signing_key: Any,
+        retired_keys: list[Any] | None = None,
+        kid: str | None = None,
+    ):
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+
+        if algorithm.startswith("HS"):
+            # shared secret, nothing to publish
+            self.active = VerificationKey(kid, algorithm, signing_key, None)
+        else:
+            self.active = verification_key(algorithm, signing_key.public_key())
+        self.keys = {self.active.kid: self.active}
+        for public_key in retired_keys or []:
+            key = verification_key(key_algorithm(public_key), public_key)
+            self.keys.setdefault(key.kid, key)
+
+        self._jwks = {"keys": [key.jwk for key in self.keys.values() if key.jwk is not None]}
+
+    def encode(self, payload: dict) -> str:
+        headers = {"kid": self.active.kid} if self.active.kid else None
+        return jwt.encode(payload, self.signing_key, algorithm=self.algorithm, headers=headers)
+
+    def decode(self, token: str) -> dict:
+        # tokens without kid predate key ids and were signed by the active key
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.keys.get(kid) if kid else self.active
+        if key is None:
+            raise InvalidTokenError(f"Unknown key id {kid}")
+        # the algorithm is pinned by the key, never taken from the token header
+        return jwt.decode(token, key.key, algorithms=[key.algorithm])
+
+    def jwks(self) -> dict:
+        return self._jwks
+
+
+@lru_cache
+def get_keyring() -> KeyRing:
+    """
+    Key ring from settings, built once per process.
+    """
+    if settings.ALGO.startswith("HS"):
+        return KeyRing(settings.ALGO, settings.JWT_SECRET_KEY, kid=settings.JWT_KEY_ID or None)
+
+    from cryptography.hazmat.primitives.serialization import (
+        load_pem_private_key,
+        load_pem_public_key,
+    )
+
+    signing_key = load_pem_private_key(Path(settings.JWT_PRIVATE_KEY_FILE).read_bytes(), None)
+    retired_keys = [
+        load_pem_public_key(Path(path).read_bytes()) for path in settings.JWT_RETIRED_KEY_FILES
+    ]
+    return KeyRing(settings.ALGO, signing_key, retired_keys)
@@ -0,0 +1,179 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import re
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# a caller supplied id is kept only if it is short and plain, otherwise one is generated
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# attributes every LogRecord has, anything else was passed in through extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "taskName",
+    "request_id",
+    # uvicorn's ANSI coloured copy of the message
+    "color_message",
+}
+
+# created by queue_handler(), and their started listeners
+_handlers: list["LogQueueHandler"] = []
+_listeners: list[QueueListener] = []
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Stamp the current request id on each record. Runs on the emitting thread, where
+    the request context is still set.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record, with the request id and any extra= fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None) is not None:
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class LogQueueHandler(QueueHandler):
+    """
+    Hands records to a QueueListener thread, so a slow log sink never blocks the
+    caller. Only the message and traceback are rendered here, before the arguments
+    change or the frames are released; formatting is left to the listener's handlers.
+    """
+
+    listener: QueueListener | None = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def queue_handler(handlers: list, respect_handler_level: bool = True) -> LogQueueHandler:
+    """
+    logging.yml factory for a LogQueueHandler feeding the given handlers
+    (cfg://handlers.<name>) through a QueueListener. The listener is started by
+    start_log_listeners(), in the process that serves requests.
+    """
+    # dictConfig converts cfg:// references on item access, not on iteration
+    targets = [handlers[i] for i in range(len(handlers))]
+    for target in targets:
+        if not isinstance(target, logging.Handler):
+            # handlers are configured in name order, the targets must sort first
+            raise ValueError(f"Queue handler target {target!r} is not configured yet")
+    handler = LogQueueHandler(queue.SimpleQueue())
+    handler.listener = QueueListener(
+        handler.queue, *targets, respect_handler_level=respect_handler_level
+    )
+    _handlers.append(handler)
+    return handler
+
+
+def start_log_listeners() -> None:
+    """
+    Start the listener thread of every configured LogQueueHandler. Called from the
+    app lifespan in each worker, and by the gunicorn master; a forked worker starts
+    with fresh queues and listeners. Records logged earlier wait in the queue. The
+    listeners drain and stop at exit, after the server's own shutdown messages.
+    """
+    for handler in _handlers:
+        if handler.listener not in _listeners:
+            handler.listener.start()
+            if not _listeners:
+                atexit.register(stop_log_listeners)
+            _listeners.append(handler.listener)
+
+
+def stop_log_listeners() -> None:
+    """
+    Flush queued records and stop the listener threads.
+    """
+    while _listeners:
+        _listeners.pop().stop()
+
+
+def _reset_after_fork() -> None:
+    # listener threads do not survive a fork and the queue may hold the parent's
+    # records: the child gets fresh ones, started by its own start_log_listeners()
+    _listeners.clear()
+    for handler in _handlers:
+        listener = handler.listener
+        handler.queue = queue.SimpleQueue()
+        handler.listener = QueueListener(
+            handler.queue, *listener.handlers, respect_handler_level=listener.respect_handler_level
+        )
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class RequestIdMiddleware:
+    """
+    Pure ASGI middleware binding a request id to the log records of each request. The
+    caller's X-Request-ID is reused when valid, and the id is echoed on the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        incoming = next((value for key, value in scope["headers"] if key == b"x-request-id"), b"")
+        current = incoming.decode("latin-1")
+        if not _VALID_REQUEST_ID.fullmatch(current):
+            current = uuid.uuid4().hex
+        header = (b"x-request-id", current.encode("latin-1"))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), header]
+            await send(message)
+
+        token = request_id.set(current)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id.reset(token)
@@ -0,0 +1,146 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# Buckets tuned per metric: requests span cached reads to Argon2 logins, queries are
+# mostly sub-millisecond.
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 1, 2)
+
+http_request_duration = Histogram(
+    "qftb_http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+db_query_duration = Histogram(
+    "qftb_db_query_duration_seconds",
+    "Database statement latency",
+    ["statement"],
+    buckets=QUERY_BUCKETS,
+)
+password_hash_duration = Histogram(
+    "qftb_password_hash_duration_seconds",
+    "Argon2 hash/verify latency, including the wait for a pool process",
+    ["operation"],
+    buckets=HASH_BUCKETS,
+)
+jwt_operations = Counter(
+    "qftb_jwt_operations_total",
+    "Access token signs and verifications",
+    ["operation", "result"],
+)
+logins = Counter("qftb_logins_total", "Login attempts", ["result"])
+refresh_rotations = Counter("qftb_refresh_rotations_total", "Refresh token rotations", ["result"])
+refresh_filter_checks = Counter(
+    "qftb_refresh_filter_checks_total",
+    "Refresh tokens rejected by the revocation filter, passed to the database, or passed "
+    "but not live (false_positive)",
+    ["result"],
+)
+refresh_tokens_reaped = Counter(
+    "qftb_refresh_tokens_reaped_total", "Expired and revoked refresh tokens deleted by the reaper"
+)
+# livesum: summed over live workers in multiprocess mode
+db_pool_checked_out = Gauge(
+    "qftb_db_pool_checked_out", "Connections in use", multiprocess_mode="livesum"
+)
+db_pool_open = Gauge("qftb_db_pool_open", "Open connections", multiprocess_mode="livesum")
+db_pool_wait = Histogram(
+    "qftb_db_pool_wait_seconds", "Wait for a pooled connection", buckets=QUERY_BUCKETS
+)
+
+STATEMENTS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request by its route template, so
+    /user/1 and /user/2 share one series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            http_request_duration.labels(
+                scope["method"], getattr(route, "path", "<unmatched>"), str(status)
+            ).observe(time.perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Statement timing and pool gauges through SQLAlchemy events (the sync engine of an
+    AsyncEngine).
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        db_query_duration.labels(verb if verb in STATEMENTS else "OTHER").observe(elapsed)
+
+    if not isinstance(engine.pool, QueuePool):
+        return
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        db_pool_open.inc()
+
+    @event.listens_for(engine, "close")
+    def close(dbapi_connection, connection_record):
+        db_pool_open.dec()
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checked_out.inc()
+
+    @event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        db_pool_checked_out.dec()
+
+
+def render() -> tuple[bytes, str]:
+    """
+    Exposition for /metrics. Under several workers PROMETHEUS_MULTIPROC_DIR is set
+    and every worker's samples are merged from the shared directory.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
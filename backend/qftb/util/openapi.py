@@ -16,15 +16,18 @@ def custom_openapi(app: FastAPI) -> None:
     def replace_http_422():
         if app.openapi_schema:
             return app.openapi_schema
-        app.openapi_schema = get_openapi(
+        # built in a local and published once complete, other threads may read
+        # app.openapi_schema meanwhile (the lifespan builds it in the background)
+        schema = get_openapi(
             title=app.title, version=app.version, description=app.description, routes=app.routes
         )
-        for _, method_item in app.openapi_schema.get("paths").items():
+        for _, method_item in schema.get("paths").items():
             for _, param in method_item.items():
                 responses = param.get("responses")
                 # remove 422 response, also can remove other status code
                 if "422" in responses:
                     del responses["422"]
-        return app.openapi_schema
+        app.openapi_schema = schema
+        return schema
 
     app.openapi = replace_http_422
@@ -1,6 +1,32 @@
+import asyncio
+import logging
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, TypeVar
+
 import argon2
 
-ph = argon2.PasswordHasher()
+from ..config import settings
+from .cpu import available_cpus
+from .metrics import password_hash_duration
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# OWASP's floor for Argon2id, calibration never goes below it
+MIN_MEMORY_COST = 19 * 1024
+
+ph = argon2.PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
+
+_executor: ProcessPoolExecutor | None = None
 
 
 def hash(password: str) -> str:
@@ -12,3 +38,135 @@ def verify_password(password: str, hashed_password: str) -> bool:
         return ph.verify(hashed_password, password)
     except argon2.exceptions.VerifyMismatchError:
         return False
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    True when a stored hash was made with other parameters than the current ones.
+    """
+    return ph.check_needs_rehash(hashed_password)
+
+
+def pool_size() -> int:
+    """
+    Number of hashing processes, defaults to every core of the container's CPU quota.
+    """
+    return settings.PASSWORD_HASH_WORKERS or available_cpus()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Lazily start the process pool so importing this module stays cheap.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=pool_size())
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+async def run_in_pool(fn: Callable[..., T], *args) -> T:
+    """
+    fn(*args) in the process pool. A pool broken by a dead worker (an OOM kill) is
+    replaced and the call retried once; BrokenProcessPool if that fails too.
+    """
+    global _executor
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    try:
+        return await loop.run_in_executor(executor, fn, *args)
+    except BrokenProcessPool:
+        # concurrent calls fail together, only the first replaces the pool
+        if _executor is executor:
+            logger.warning("Password hashing pool broken, starting a new one")
+            executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+    try:
+        return await loop.run_in_executor(get_executor(), fn, *args)
+    except BrokenProcessPool:
+        logger.exception("Password hashing pool broken again")
+        raise
+
+
+async def hash_async(password: str) -> str:
+    """
+    Argon2 hash in the process pool, keeps the event loop and GIL free.
+    """
+    with password_hash_duration.labels("hash").time(), tracer.start_as_current_span("argon2.hash"):
+        return await run_in_pool(hash, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    with (
+        password_hash_duration.labels("verify").time(),
+        tracer.start_as_current_span("argon2.verify"),
+    ):
+        return await run_in_pool(verify_password, password, hashed_password)
+
+
+def _time_verify(time_cost: int, memory_cost: int, parallelism: int) -> float:
+    hasher = argon2.PasswordHasher(
+        time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+    )
+    hashed_password = hasher.hash("calibration-password")
+    start = time.perf_counter()
+    hasher.verify(hashed_password, "calibration-password")
+    return (time.perf_counter() - start) * 1000
+
+
+def verify_p99_ms(
+    executor: ProcessPoolExecutor,
+    time_cost: int,
+    memory_cost: int,
+    parallelism: int,
+    samples: int,
+) -> float:
+    """
+    p99 verify time with every pool worker busy, the way logins run under load.
+    """
+    timings = list(
+        executor.map(
+            _time_verify,
+            [time_cost] * samples,
+            [memory_cost] * samples,
+            [parallelism] * samples,
+        )
+    )
+    return statistics.quantiles(timings, n=100)[98]
+
+
+def calibrate(
+    target_p99_ms: float,
+    parallelism: int,
+    max_memory_cost: int,
+    samples: int = 50,
+    max_time_cost: int = 10,
+) -> tuple[int, int, float]:
+    """
+    Strongest (time_cost, memory_cost) whose p99 verify stays within the target.
+
+    Memory is the first priority: start at max_memory_cost, halve it until time_cost=1
+    fits (not below MIN_MEMORY_COST), then raise time_cost while it still fits.
+    Returns the measured p99 too, above the target when even the floor is too slow.
+    """
+    with ProcessPoolExecutor(max_workers=pool_size()) as executor:
+        memory_cost = max_memory_cost
+        while True:
+            p99 = verify_p99_ms(executor, 1, memory_cost, parallelism, samples)
+            if p99 <= target_p99_ms or memory_cost == MIN_MEMORY_COST:
+                break
+            memory_cost = max(memory_cost // 2, MIN_MEMORY_COST)
+
+        time_cost = 1
+        while time_cost < max_time_cost:
+            next_p99 = verify_p99_ms(executor, time_cost + 1, memory_cost, parallelism, samples)
+            if next_p99 > target_p99_ms:
+                break
+            time_cost, p99 = time_cost + 1, next_p99
+        return time_cost, memory_cost, p99
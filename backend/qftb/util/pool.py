@@ -0,0 +1,73 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from .metrics import db_pool_wait
+
+
+@dataclass
+class PoolWaitStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long callers wait for a connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            # connect errors are not waits for the pool, they propagate uncounted
+            with self._stats_lock:
+                self.wait_stats.timeouts += 1
+            raise
+        waited = time.perf_counter() - start
+        db_pool_wait.observe(waited)
+        with self._stats_lock:
+            self.wait_stats.checkouts += 1
+            self.wait_stats.wait_total += waited
+            self.wait_stats.wait_max = max(self.wait_stats.wait_max, waited)
+        return conn
+
+    def recreate(self):
+        # keep counters across engine.dispose()
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+def pool_status(pool: Pool) -> dict:
+    """
+    Live pool counters, empty for pools without a queue (e.g. in-memory SQLite).
+    """
+    if not isinstance(pool, QueuePool):
+        return {}
+    status = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        status.update(
+            checkouts=wait_stats.checkouts,
+            timeouts=wait_stats.timeouts,
+            wait_avg_ms=wait_stats.wait_total / max(wait_stats.checkouts, 1) * 1000,
+            wait_max_ms=wait_stats.wait_max * 1000,
+        )
+    return status
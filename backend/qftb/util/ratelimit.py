@@ -0,0 +1,88 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+
+from ..config import settings
+
+
+class RateLimiter(ABC):
+    """
+    Allows `limit` hits per `window` seconds per key.
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+
+    @abstractmethod
+    async def hit(self, key: str) -> bool:
+        """
+        Record a hit for key, False when it is over the limit.
+        """
+
+
+class MemoryRateLimiter(RateLimiter):
+    """
+    Per-process token bucket, O(1) per hit.
+
+    Buckets live in an LRU bounded by max_keys. An evicted key starts again with a
+    full bucket, which only ever errs on the permissive side.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = 100_000):
+        super().__init__(limit, window)
+        self.max_keys = max_keys
+        self.rate = limit / window
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def hit(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.limit, now))
+            tokens = min(self.limit, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+
+class RedisRateLimiter(RateLimiter):
+    """
+    Fixed window counter shared by every worker through a Redis-protocol server
+    (Redis, Valkey, KeyDB, ...).
+    """
+
+    def __init__(self, limit: int, window: float, url: str, prefix: str = "qftb:ratelimit:"):
+        super().__init__(limit, window)
+        # optional dependency, only needed for this backend
+        import redis.asyncio
+
+        self.redis = redis.asyncio.from_url(url)
+        self.prefix = prefix
+
+    async def hit(self, key: str) -> bool:
+        window = int(time.time() // self.window)
+        name = f"{self.prefix}{key}:{window}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            count, _ = await pipe.incr(name).expire(name, int(self.window) + 1).execute()
+        return count <= self.limit
+
+
+@lru_cache
+def get_refresh_limiter() -> RateLimiter:
+    """
+    Refresh rate limiter for the configured backend, one per process.
+    """
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimiter(
+            settings.REFRESH_RATE_LIMIT, settings.REFRESH_RATE_WINDOW, settings.REDIS_URL
+        )
+    return MemoryRateLimiter(
+        settings.REFRESH_RATE_LIMIT, settings.REFRESH_RATE_WINDOW, settings.RATE_LIMIT_MAX_KEYS
+    )
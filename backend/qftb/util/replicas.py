@@ -0,0 +1,153 @@
+import asyncio
+import itertools
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass
+from http.cookies import CookieError, SimpleCookie
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_COOKIE = "readPrimary"
+WRITES = {"INSERT", "UPDATE", "DELETE"}
+
+
+@dataclass
+class Routing:
+    """
+    Per request: pinned reads go to the primary, wrote is set by a write statement.
+    """
+
+    pinned: bool = False
+    wrote: bool = False
+
+
+routing: ContextVar[Routing | None] = ContextVar("routing", default=None)
+
+
+class ReplicaSet:
+    """
+    Read replica engines, handed out round-robin among those that answered the last
+    health check. Every replica counts as healthy until checked.
+    """
+
+    def __init__(self, engines: list[AsyncEngine], timeout: float = 2.0):
+        self.engines = engines
+        self.timeout = timeout
+        self.healthy = set(range(len(engines)))
+        self._next = itertools.count()
+
+    def pick(self) -> AsyncEngine | None:
+        """
+        Next healthy replica, None when there is none and reads use the primary.
+        """
+        for _ in range(len(self.engines)):
+            index = next(self._next) % len(self.engines)
+            if index in self.healthy:
+                return self.engines[index]
+        return None
+
+    async def check(self) -> None:
+        """
+        SELECT 1 on every replica, concurrently.
+        """
+        results = await asyncio.gather(*(self._ping(engine) for engine in self.engines))
+        for index, (engine, error) in enumerate(zip(self.engines, results)):
+            # logged on transitions only
+            if error is None and index not in self.healthy:
+                logger.info("Replica %s is back", _name(engine))
+                self.healthy.add(index)
+            elif error is not None and index in self.healthy:
+                logger.warning("Replica %s failed its health check: %r", _name(engine), error)
+                self.healthy.discard(index)
+
+    async def _ping(self, engine: AsyncEngine) -> Exception | None:
+        try:
+            async with asyncio.timeout(self.timeout):
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+        except Exception as err:
+            return err
+        return None
+
+    async def monitor(self, interval: float) -> None:
+        """
+        Check every interval seconds, runs for the app lifetime.
+        """
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+    def status(self) -> list[dict]:
+        return [
+            {"host": engine.url.host, "database": engine.url.database, "healthy": i in self.healthy}
+            for i, engine in enumerate(self.engines)
+        ]
+
+
+def _name(engine: AsyncEngine) -> str | None:
+    return engine.url.host or engine.url.database
+
+
+def primary_pinned() -> bool:
+    state = routing.get()
+    return state is not None and state.pinned
+
+
+def track_writes(engine: Engine) -> None:
+    """
+    Flag the current request as a writer on every INSERT/UPDATE/DELETE through the
+    primary (the sync engine of an AsyncEngine).
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        state = routing.get()
+        if state is not None and not state.wrote:
+            verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+            state.wrote = verb in WRITES
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pure ASGI middleware pinning a client's reads to the primary for `window` seconds
+    after one of its requests wrote, so it does not read a lagging replica. The pin
+    is a cookie and holds on every worker.
+    """
+
+    def __init__(self, app, window: float):
+        self.app = app
+        self.cookie = (
+            f"{PRIMARY_COOKIE}=1; Max-Age={max(1, round(window))}; Path=/; HttpOnly; SameSite=lax"
+        ).encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        state = Routing(pinned=_has_pin(scope["headers"]))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and state.wrote:
+                message["headers"] = [*message.get("headers", ()), (b"set-cookie", self.cookie)]
+            await send(message)
+
+        token = routing.set(state)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            routing.reset(token)
+
+
+def _has_pin(headers) -> bool:
+    for key, value in headers:
+        if key == b"cookie":
+            try:
+                if PRIMARY_COOKIE in SimpleCookie(value.decode("latin-1")):
+                    return True
+            except CookieError:
+                pass
+    return False
@@ -0,0 +1,53 @@
+import hashlib
+from typing import Any, Mapping
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Default response class, rendered by pydantic-core instead of the stdlib json.
+
+    Same compact UTF-8 output as JSONResponse, and handles datetimes, UUIDs and
+    models without a jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def model_response(
+    model: BaseModel, status_code: int = 200, headers: Mapping[str, str] | None = None
+) -> Response:
+    """
+    JSON body straight from an already valid model, aliased like response_model.
+
+    Returning a Response skips FastAPI's response_model validation and
+    re-serialization; the route's response_model still documents the schema.
+    """
+    return Response(
+        model.model_dump_json(by_alias=True),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def etag(body: bytes) -> str:
+    """
+    Strong validator for a response body.
+    """
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, current: str) -> bool:
+    """
+    If-None-Match check, weak comparison as RFC 9110 requires for GET.
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == current for tag in if_none_match.split(","))
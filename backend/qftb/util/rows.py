@@ -0,0 +1,29 @@
+from typing import Any, Sequence
+
+from pydantic import BaseModel
+from pydantic_core import to_json
+from sqlalchemy import Row, Select, select
+
+
+class RowEncoder:
+    """
+    Select only a schema's fields as plain rows and write them straight to JSON.
+
+    Skips ORM hydration, the identity map and per-row model validation: rows come
+    from our own typed columns. The first selected column is the keyset `cursor`.
+    """
+
+    def __init__(self, entity: Any, schema: type[BaseModel], cursor: Any):
+        self.schema = schema
+        self.columns = [getattr(entity, name) for name in schema.model_fields]
+        self.keys = [field.alias or name for name, field in schema.model_fields.items()]
+        self.cursor = cursor
+
+    def select(self) -> Select:
+        return select(self.cursor.label("cursor"), *self.columns).order_by(self.cursor)
+
+    def dumps(self, rows: Sequence[Row]) -> bytes:
+        return to_json([dict(zip(self.keys, row[1:])) for row in rows])
+
+    def dumps_line(self, row: Row) -> bytes:
+        return to_json(dict(zip(self.keys, row[1:]))) + b"\n"
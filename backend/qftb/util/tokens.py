@@ -0,0 +1,8 @@
+import hashlib
+
+
+def token_digest(token: str) -> bytes:
+    """
+    SHA-256 of an opaque refresh token, only the digest is stored.
+    """
+    return hashlib.sha256(token.encode()).digest()
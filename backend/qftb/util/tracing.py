@@ -0,0 +1,142 @@
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..config import settings
+
+# No-op until configure_tracing() installs the SDK provider, spans then cost a
+# context lookup only.
+tracer = trace.get_tracer("qftb")
+
+_provider = None
+
+
+def configure_tracing() -> None:
+    """
+    SDK provider with ratio sampling (children follow the parent's decision) and a
+    batching exporter, so export never runs on the request path.
+    """
+    global _provider
+    # optional dependency, only needed when tracing is enabled
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(_span_exporter()))
+    trace.set_tracer_provider(_provider)
+
+
+def _span_exporter():
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if settings.TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    if settings.TRACING_EXPORTER == "file":
+
+        class FileSpanExporter(ConsoleSpanExporter):
+            """
+            One JSON span per line, closing the file when the provider shuts down.
+            """
+
+            def shutdown(self) -> None:
+                self.out.close()
+
+        out = open(settings.TRACING_FILE, "a", encoding="utf-8")
+        return FileSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    return ConsoleSpanExporter()
+
+
+def shutdown_tracing() -> None:
+    """
+    Flush buffered spans and close the exporter.
+    """
+    if _provider is not None:
+        _provider.shutdown()
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware opening a server span per HTTP request, continuing a W3C
+    traceparent from the caller. The span is renamed to the route template once the
+    router has matched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = {
+            key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]
+        }
+        method = scope["method"]
+        with tracer.start_as_current_span(
+            method,
+            context=propagate.extract(headers),
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        ) as span:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    span.set_attribute("http.route", route.path)
+                    span.update_name(f"{method} {route.path}")
+
+
+def trace_engine(engine: Engine) -> None:
+    """
+    Client span per SQL statement through SQLAlchemy events (the sync engine of an
+    AsyncEngine). Statements outside a sampled trace are skipped.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not trace.get_current_span().is_recording():
+            return
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        span = tracer.start_span(
+            verb,
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": engine.dialect.name,
+                "db.query.text": statement,
+                "db.operation.name": verb,
+            },
+        )
+        conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            spans.pop().end()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("trace_spans") if conn is not None else None
+        if spans:
+            span = spans.pop()
+            span.record_exception(exception_context.original_exception)
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
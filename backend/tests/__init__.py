@@ -0,0 +1,6 @@
+import os
+
+# Offline defaults, the suite runs against in-memory SQLite
+os.environ.setdefault("DB_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-for-the-test-suite")
+os.environ.setdefault("ALGO", "HS256")
@@ -1,40 +1,60 @@
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 from qftb.database import Base, get_db
 from qftb.main import app
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from qftb.service.user_service import user_cache
+from qftb.util.ratelimit import MemoryRateLimiter, get_refresh_limiter
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.pool import StaticPool
 
 
-@pytest.fixture(name="session")
-def session_fixture():
-    SQLALCHEMY_DATABASE_URL = "sqlite://"
+async def create_schema(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite://"
 
-    engine = create_engine(
+    engine = create_async_engine(
         SQLALCHEMY_DATABASE_URL,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
 
-    Base.metadata.create_all(bind=engine)
+    asyncio.run(create_schema(engine))
 
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    yield engine
+
+
+@pytest.fixture(name="session")
+def session_fixture(engine: AsyncEngine):
+    TestingSessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
-    def override_get_db():
-        try:
-            db = TestingSessionLocal()
+    async def override_get_db():
+        async with TestingSessionLocal() as db:
             yield db
-        finally:
-            db.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    # fresh limiter per test, state would leak through the process-wide one
+    refresh_limiter = MemoryRateLimiter(3, 60)
+    app.dependency_overrides[get_refresh_limiter] = lambda: refresh_limiter
+    # cached user ids would outlive the per-test database
+    user_cache.clear()
 
     yield TestingSessionLocal()
 
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session):
+def client_fixture(session: AsyncSession):
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
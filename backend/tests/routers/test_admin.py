@@ -0,0 +1,92 @@
+import csv
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from qftb.config import settings
+
+
+def user(i: int) -> dict:
+    return {
+        "firstName": f"First{i}",
+        "lastName": f"Last{i}",
+        "email": f"User{i}@example.com",
+        "password": "1Wouldyoulikesomegreeneggsandham",
+    }
+
+
+@pytest.fixture
+def allowed_ip(monkeypatch):
+    monkeypatch.setattr(settings, "ALLOWED_IP_ADDRESSES", ["testclient"])
+
+
+def import_ndjson(client: TestClient, lines: list[str], **params) -> list[dict]:
+    res = client.post("/admin/users/import", params=params, content="\n".join(lines))
+    assert res.status_code == 200
+    return [json.loads(line) for line in res.text.splitlines()]
+
+
+def test_import_users_ndjson(client: TestClient, allowed_ip):
+    client.post("/user", json=user(0))
+    lines = [
+        json.dumps(user(0)),  # already exists
+        json.dumps(user(1)),
+        json.dumps(user(1)),  # repeated in the batch
+        "{not json",
+        json.dumps({**user(2), "password": "short"}),
+        json.dumps(user(3)),
+    ]
+
+    progress = import_ndjson(client, lines, batch_size=4)
+
+    assert [(p["received"], p["created"], p["conflicts"], p["invalid"]) for p in progress] == [
+        (4, 1, 2, 1),
+        (6, 2, 2, 2),
+    ]
+    issues = [issue for p in progress for issue in p["issues"]]
+    assert [(issue["line"], issue["email"]) for issue in issues] == [
+        (1, "user0@example.com"),
+        (3, "user1@example.com"),
+        (4, None),
+        (5, None),
+    ]
+    assert issues[0]["detail"] == "User already exists"
+
+    admin_view = client.get("/admin/users").json()
+    assert [u["email"] for u in admin_view] == [f"user{i}@example.com" for i in (0, 1, 3)]
+    assert admin_view[1]["firstName"] == "first1"
+    assert admin_view[1]["hashedPassword"].startswith("$argon2")
+
+
+def test_import_users_csv_rerun_skips_existing(client: TestClient, allowed_ip):
+    body = "firstName,lastName,email,password\n" + "".join(
+        ",".join(user(i).values()) + "\n" for i in range(3)
+    )
+
+    first = client.post("/admin/users/import", params={"format": "csv"}, content=body)
+    again = client.post("/admin/users/import", params={"format": "csv"}, content=body)
+
+    assert json.loads(first.text.splitlines()[-1])["created"] == 3
+    last = json.loads(again.text.splitlines()[-1])
+    assert (last["created"], last["conflicts"]) == (0, 3)
+    assert [issue["line"] for issue in last["issues"]] == [2, 3, 4]
+
+
+def test_import_users_restricted_ip(client: TestClient):
+    res = client.post("/admin/users/import", content=json.dumps(user(1)))
+
+    assert res.status_code == 403
+
+
+def test_import_users_bad_rows_reported_per_line(client: TestClient, allowed_ip):
+    header = b"firstName,lastName,email,password\n"
+    rows = [",".join(user(i).values()).encode() + b"\n" for i in range(3)]
+    oversized = b"a,b," + b"x" * (csv.field_size_limit() + 1) + b",p\n"
+    body = header + rows[0] + b"\xff\xfe,not,utf8,\n" + oversized + rows[1] + rows[2]
+
+    res = client.post("/admin/users/import", params={"format": "csv"}, content=body)
+
+    assert res.status_code == 200
+    last = json.loads(res.text.splitlines()[-1])
+    assert (last["created"], last["invalid"]) == (3, 2)
+    assert [issue["line"] for issue in last["issues"]] == [3, 4]
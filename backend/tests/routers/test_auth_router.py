@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+
+import argon2
+import httpx
+from fastapi.testclient import TestClient
+from qftb.database import get_db
+from qftb.main import app
+from qftb.models import RefreshToken, User
+from qftb.util.password import ph
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from tests.conftest import create_schema
+
+USER = {
+    "firstName": "Sam",
+    "lastName": "Iam",
+    "email": "greeneggs@ham.com",
+    "password": "1Wouldyoulikesomegreeneggsandham",
+}
+CREDENTIALS = {"username": USER["email"], "password": USER["password"]}
+
+
+def test_login_happy_path(client: TestClient):
+    client.post("/user", json=USER)
+    res = client.post("/auth/login", data=CREDENTIALS)
+
+    assert res.status_code == 200
+    assert res.json()["tokenType"] == "bearer"
+    assert "refreshToken" in res.cookies
+
+
+def test_login_wrong_password(client: TestClient):
+    client.post("/user", json=USER)
+    res = client.post("/auth/login", data={**CREDENTIALS, "password": "1Wrongpassword"})
+
+    assert res.status_code == 401
+
+
+def test_login_statement_count(client: TestClient, engine: AsyncEngine):
+    client.post("/user", json=USER)
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement.split()[0].upper())
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        res = client.post("/auth/login", data=CREDENTIALS)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    assert res.status_code == 200
+    # lookup, limit update, token clean up, token insert - one transaction
+    assert statements == ["SELECT", "UPDATE", "DELETE", "INSERT"]
+
+
+def test_refresh_rotates_token(client: TestClient):
+    client.post("/user", json=USER)
+    client.post("/auth/login", data=CREDENTIALS)
+    old_token = client.cookies["refreshToken"]
+
+    res = client.get("/auth/refresh")
+    assert res.status_code == 200
+    assert client.cookies["refreshToken"] != old_token
+
+    # replaying the rotated token fails
+    client.cookies.set("refreshToken", old_token)
+    assert client.get("/auth/refresh").status_code == 401
+
+
+def test_refresh_rate_limit(client: TestClient):
+    client.post("/user", json=USER)
+    client.post("/auth/login", data=CREDENTIALS)
+
+    statuses = [client.get("/auth/refresh").status_code for _ in range(4)]
+    assert statuses == [200, 200, 200, 429]
+
+
+def test_concurrent_refresh_single_winner(tmp_path):
+    # file database so every request gets its own connection and transaction
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'auth.db'}")
+    SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with SessionLocal() as db:
+            yield db
+
+    async def run() -> list[int]:
+        await create_schema(engine)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            await ac.post("/user", json=USER)
+            await ac.post("/auth/login", data=CREDENTIALS)
+            headers = {"Cookie": f"refreshToken={ac.cookies['refreshToken']}"}
+            responses = await asyncio.gather(
+                *(ac.get("/auth/refresh", headers=headers) for _ in range(20))
+            )
+        await engine.dispose()
+        return [res.status_code for res in responses]
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        statuses = asyncio.run(run())
+    finally:
+        app.dependency_overrides.clear()
+
+    assert statuses.count(200) == 1
+    assert statuses.count(401) == 19
+
+
+def test_refresh_token_stored_as_digest(client: TestClient, engine: AsyncEngine):
+    client.post("/user", json=USER)
+    client.post("/auth/login", data=CREDENTIALS)
+
+    async def stored_digest() -> bytes:
+        async with AsyncSession(engine) as db:
+            return await db.scalar(select(RefreshToken.token_digest))
+
+    stored = asyncio.run(stored_digest())
+    assert stored == hashlib.sha256(client.cookies["refreshToken"].encode()).digest()
+
+
+def test_login_rehashes_outdated_password(client: TestClient, engine: AsyncEngine):
+    client.post("/user", json=USER)
+    legacy = argon2.PasswordHasher(time_cost=1, memory_cost=8192, parallelism=1)
+
+    async def run(stmt):
+        async with AsyncSession(engine) as db:
+            result = await db.execute(stmt)
+            await db.commit()
+            return result
+
+    asyncio.run(run(update(User).values(hashed_password=legacy.hash(USER["password"]))))
+    assert client.post("/auth/login", data=CREDENTIALS).status_code == 200
+
+    stored = asyncio.run(run(select(User.hashed_password))).scalar_one()
+    assert not ph.check_needs_rehash(stored)
+    assert client.post("/auth/login", data=CREDENTIALS).status_code == 200
@@ -1,4 +1,12 @@
+import asyncio
+import json
+
 from fastapi.testclient import TestClient
+from qftb.models import User
+from qftb.util.replicas import ReplicaSet
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+from tests.conftest import create_schema
 
 
 def test_read_users_non_admin(client: TestClient):
@@ -18,3 +26,86 @@ def test_create_single_user_happy_path(client: TestClient):
 
     assert res.status_code == 201
     assert data == {"detail": "User created successfully"}
+
+
+def add_users(engine: AsyncEngine, count: int) -> None:
+    async def run():
+        async with AsyncSession(engine) as db:
+            db.add_all(
+                User(
+                    first_name=f"first{i}",
+                    last_name=f"last{i}",
+                    email=f"user{i}@example.com",
+                    hashed_password="x",
+                )
+                for i in range(count)
+            )
+            await db.commit()
+
+    asyncio.run(run())
+
+
+def test_read_users_keyset_pages(client: TestClient, engine: AsyncEngine):
+    add_users(engine, 5)
+
+    first = client.get("/user", params={"limit": 2})
+    assert [user["id"] for user in first.json()] == [1, 2]
+    assert first.headers["X-Next-Cursor"] == "2"
+
+    second = client.get("/user", params={"limit": 2, "after": 4})
+    assert [user["id"] for user in second.json()] == [5]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_read_users_ndjson_stream(client: TestClient, engine: AsyncEngine):
+    add_users(engine, 3)
+
+    res = client.get("/user", params={"format": "ndjson", "after": 1})
+    lines = [json.loads(line) for line in res.text.splitlines()]
+
+    assert res.headers["content-type"] == "application/x-ndjson"
+    assert [line["id"] for line in lines] == [2, 3]
+    assert lines[0]["firstName"] == "first1"
+
+
+def test_create_user_duplicate_skips_hashing(client: TestClient, monkeypatch):
+    payload = {
+        "firstName": "Sam",
+        "lastName": "Iam",
+        "email": "greeneggs@ham.com",
+        "password": "1Wouldyoulikesomegreeneggsandham",
+    }
+    assert client.post("/user", json=payload).status_code == 201
+
+    async def no_hashing(password: str) -> str:
+        raise AssertionError("hashed a duplicate signup")
+
+    monkeypatch.setattr("qftb.service.user_service.hash_async", no_hashing)
+    res = client.post("/user", json={**payload, "email": "GreenEggs@ham.com"})
+
+    assert res.status_code == 409
+    assert res.json() == {"detail": "User already exists"}
+
+
+def test_read_users_served_by_a_replica(client: TestClient, engine: AsyncEngine, monkeypatch):
+    replica = create_async_engine(
+        "sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    asyncio.run(create_schema(replica))
+    add_users(replica, 3)
+    add_users(engine, 1)
+    monkeypatch.setattr("qftb.database.replicas", ReplicaSet([replica]))
+
+    assert len(client.get("/user").json()) == 3
+    assert len(client.get("/admin/users").json()) == 3
+    # writes go to the primary
+    client.post(
+        "/user",
+        json={
+            "firstName": "Sam",
+            "lastName": "Iam",
+            "email": "greeneggs@ham.com",
+            "password": "1Wouldyoulikesomegreeneggsandham",
+        },
+    )
+    assert len(client.get("/user").json()) == 3
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from qftb.schemas import UserInfo
+from qftb.service.auth_service import AuthenticationManager, jwt_cache
+from qftb.util import jwks
+
+
+@pytest.fixture(autouse=True)
+def clear_jwt_cache():
+    jwt_cache.clear()
+    yield
+    jwt_cache.clear()
+
+
+def test_decode_token_verifies_once(monkeypatch):
+    auth_manager = AuthenticationManager(db=None, refresh_limiter=None)
+    token = auth_manager.generate_access_token(
+        UserInfo(id=1, username="a@b.com"), timedelta(minutes=15)
+    )
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwks.jwt, "decode", counting_decode)
+    first = auth_manager.decode_token(f"Bearer {token}")
+    second = auth_manager.decode_token(f"Bearer {token}")
+
+    assert first == second
+    assert first.id == 1
+    assert len(calls) == 1
+    assert jwt_cache.stats()["hits"] == 1
+
+
+def test_decode_token_invalid_not_cached():
+    auth_manager = AuthenticationManager(db=None, refresh_limiter=None)
+    with pytest.raises(HTTPException) as exc_info:
+        auth_manager.decode_token("Bearer not-a-token")
+
+    assert exc_info.value.status_code == 401
+    assert jwt_cache.stats()["size"] == 0
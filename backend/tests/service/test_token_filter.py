@@ -0,0 +1,185 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from qftb.models import RefreshToken, User
+from qftb.service.token_filter import PUBLISH_ATTEMPTS, REBUILD_MARGIN, RefreshTokenFilter
+from qftb.util.dates import utcnow
+from qftb.util.invalidation import InvalidationChannel
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from tests.routers.test_auth_router import CREDENTIALS, USER
+
+
+@pytest.fixture(name="token_filter")
+def token_filter_fixture(engine: AsyncEngine, monkeypatch):
+    token_filter = RefreshTokenFilter(
+        enabled=True, session_factory=async_sessionmaker(engine), capacity=1000
+    )
+    monkeypatch.setattr("qftb.service.auth_service.token_filter", token_filter)
+    return token_filter
+
+
+class FlakyChannel(InvalidationChannel):
+    """
+    Subscribes, then loses the subscription once `fail` is set; publishing fails.
+    """
+
+    def __init__(self):
+        self.fail = asyncio.Event()
+        self.published = 0
+
+    async def publish(self, key):
+        self.published += 1
+        raise ConnectionError("channel down")
+
+    async def listen(self, drop, reset, lost=None):
+        reset()
+        await self.fail.wait()
+        lost()
+        await asyncio.Event().wait()
+
+
+def count_statements(engine: AsyncEngine, request):
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement.split()[0].upper())
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        res = request()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+    return res, statements
+
+
+def test_rebuild_loads_live_tokens_only(engine: AsyncEngine, token_filter: RefreshTokenFilter):
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    now = utcnow()
+
+    async def run():
+        async with SessionLocal() as db:
+            user = User(first_name="a", last_name="b", email="a@b.com", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            for i, (expires_at, revoked) in enumerate(
+                [(now + timedelta(hours=1), False), (now + timedelta(hours=1), True)]
+                + [(now - timedelta(hours=1), False)]
+            ):
+                digest = bytes([i]) * 32
+                db.add(
+                    RefreshToken(
+                        user_id=user.id, token_digest=digest, expires_at=expires_at, revoked=revoked
+                    )
+                )
+            await db.commit()
+        # issued by a transaction that had not committed at the snapshot
+        token_filter.add(bytes([9]) * 32)
+        await token_filter.rebuild()
+
+    assert token_filter.maybe_live(bytes([0]) * 32)
+    asyncio.run(run())
+
+    assert [token_filter.maybe_live(bytes([i]) * 32) for i in (0, 1, 2, 9)] == [
+        True,
+        False,
+        False,
+        True,
+    ]
+    token_filter.revoke(bytes([0]) * 32)
+    assert not token_filter.maybe_live(bytes([0]) * 32)
+    assert token_filter.status()["live"]["items"] == 2
+
+
+def test_reset_passes_everything_until_rebuilt(
+    engine: AsyncEngine, token_filter: RefreshTokenFilter
+):
+    asyncio.run(token_filter.rebuild())
+    assert not token_filter.maybe_live(b"x" * 32)
+
+    token_filter.reset()
+    assert token_filter.maybe_live(b"x" * 32)
+
+    token_filter.receive("+" + (b"y" * 32).hex())
+    asyncio.run(token_filter.rebuild())
+    assert token_filter.maybe_live(b"y" * 32)
+
+
+def test_channel_loss_passes_everything(token_filter: RefreshTokenFilter, monkeypatch):
+    channel = FlakyChannel()
+    monkeypatch.setattr("qftb.service.token_filter.get_filter_channel", lambda: channel)
+    token_filter.interval = 0.01
+
+    async def run():
+        task = asyncio.create_task(token_filter.run_forever())
+        try:
+            async with asyncio.timeout(5):
+                while token_filter.live is None:
+                    await asyncio.sleep(0.01)
+            assert not token_filter.maybe_live(b"x" * 32)
+
+            channel.fail.set()
+            await asyncio.sleep(0)
+            assert token_filter.maybe_live(b"x" * 32)
+            # no rebuild over several intervals while unsubscribed
+            await asyncio.sleep(0.1)
+            assert token_filter.live is None
+            assert token_filter.status()["subscribed"] is False
+        finally:
+            task.cancel()
+
+    asyncio.run(run())
+
+
+def test_failed_issue_publish_fails_the_issue(token_filter: RefreshTokenFilter, monkeypatch):
+    channel = FlakyChannel()
+    monkeypatch.setattr("qftb.service.token_filter.get_filter_channel", lambda: channel)
+    monkeypatch.setattr("qftb.service.token_filter.PUBLISH_RETRY_DELAY", 0)
+
+    # a lost revocation only delays a rejection
+    asyncio.run(token_filter.revoke_committed(b"y" * 32))
+    assert b"y" * 32 in token_filter.revoked
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(token_filter.issue(b"z" * 32))
+    assert channel.published == 2 * PUBLISH_ATTEMPTS
+
+
+def test_revoked_ages_out_without_rebuilds(token_filter: RefreshTokenFilter, monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("qftb.service.token_filter.time.monotonic", lambda: now)
+    token_filter.interval = 10
+    token_filter.revoke(b"a" * 32)
+    token_filter.revoke(b"b" * 32)
+
+    now += 10 + REBUILD_MARGIN + 1
+    token_filter.revoke(b"c" * 32)
+    assert list(token_filter.revoked) == [b"c" * 32]
+
+
+def test_dead_tokens_rejected_without_query(
+    client: TestClient, engine: AsyncEngine, token_filter: RefreshTokenFilter
+):
+    client.post("/user", json=USER)
+    asyncio.run(token_filter.rebuild())
+    client.post("/auth/login", data=CREDENTIALS)
+    old_token = client.cookies["refreshToken"]
+
+    res, statements = count_statements(engine, lambda: client.get("/auth/refresh"))
+    assert res.status_code == 200
+    assert statements[0] == "UPDATE"
+
+    # replay of the rotated token
+    client.cookies.set("refreshToken", old_token)
+    res, statements = count_statements(engine, lambda: client.get("/auth/refresh"))
+    assert res.status_code == 401
+    assert statements == []
+
+    # never issued
+    client.cookies.set("refreshToken", "forged")
+    res, statements = count_statements(engine, lambda: client.get("/auth/logout"))
+    assert res.status_code == 404
+    assert statements == []
+    assert token_filter.stats.rejected == 2
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import timedelta
+
+from prometheus_client import REGISTRY
+from qftb.models import RefreshToken, User
+from qftb.service.token_reaper import TokenReaper
+from qftb.util.dates import utcnow
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+
+def test_reaper_deletes_dead_tokens_in_batches(engine: AsyncEngine):
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    now = utcnow()
+
+    async def run():
+        async with SessionLocal() as db:
+            user = User(first_name="a", last_name="b", email="a@b.com", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            for i in range(5):
+                # expired, some of them also revoked
+                db.add(
+                    RefreshToken(
+                        user_id=user.id,
+                        token_digest=bytes([i]) * 32,
+                        expires_at=now - timedelta(hours=1),
+                        revoked=i > 2,
+                    )
+                )
+            # live tokens, one revoked
+            for i in range(5, 7):
+                db.add(
+                    RefreshToken(
+                        user_id=user.id,
+                        token_digest=bytes([i]) * 32,
+                        expires_at=now + timedelta(hours=1),
+                        revoked=i == 5,
+                    )
+                )
+            await db.commit()
+
+        reaper = TokenReaper(SessionLocal, batch_size=2, interval=0, batch_pause=0)
+        reclaimed = await reaper.reap_once()
+        async with SessionLocal() as db:
+            left = (await db.execute(select(RefreshToken.token_digest))).scalars().all()
+        return reclaimed, reaper, left
+
+    before = REGISTRY.get_sample_value("qftb_refresh_tokens_reaped_total") or 0.0
+    reclaimed, reaper, left = asyncio.run(run())
+
+    assert reclaimed == 6
+    assert left == [bytes([6]) * 32]
+    assert reaper.stats.rows_reclaimed == 6
+    assert reaper.stats.batches == 4
+    assert REGISTRY.get_sample_value("qftb_refresh_tokens_reaped_total") == before + 6
@@ -0,0 +1,46 @@
+from fastapi.testclient import TestClient
+from qftb.service.user_service import CachedUser, user_cache
+
+USER = {
+    "firstName": "Sam",
+    "lastName": "Iam",
+    "email": "greeneggs@ham.com",
+    "password": "1Wouldyoulikesomegreeneggsandham",
+}
+
+
+def auth_headers(client: TestClient) -> dict:
+    client.post("/user", json=USER)
+    res = client.post("/auth/login", data={"username": USER["email"], "password": USER["password"]})
+    return {"Authorization": f"Bearer {res.json()['accessToken']}"}
+
+
+def test_single_user_cached_with_etag(client: TestClient):
+    headers = auth_headers(client)
+
+    first = client.get("/user/1", headers=headers)
+    assert first.status_code == 200
+    assert first.json()["email"] == USER["email"]
+    etag = first.headers["ETag"]
+
+    second = client.get("/user/1", headers={**headers, "If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["ETag"] == etag
+    assert user_cache.stats()["hits"] == 1
+
+
+def test_single_user_etag_mismatch_returns_body(client: TestClient):
+    headers = auth_headers(client)
+
+    res = client.get("/user/1", headers={**headers, "If-None-Match": '"stale"'})
+    assert res.status_code == 200
+    assert res.json()["id"] == 1
+
+
+def test_create_user_invalidates_cached_id(client: TestClient):
+    user_cache.set(1, CachedUser(b"{}", '"stale"'))
+
+    client.post("/user", json=USER)
+
+    assert user_cache.get(1) is None
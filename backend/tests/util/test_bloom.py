@@ -0,0 +1,31 @@
+import hashlib
+
+from qftb.util.bloom import BloomFilter
+
+
+def digests(start: int, count: int) -> list[bytes]:
+    return [hashlib.sha256(str(i).encode()).digest() for i in range(start, start + count)]
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(10_000)
+    items = digests(0, 10_000)
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    assert bloom.count == 10_000
+
+
+def test_bloom_filter_false_positive_rate_and_size():
+    bloom = BloomFilter(10_000, error_rate=0.01)
+    for item in digests(0, 10_000):
+        bloom.add(item)
+
+    false_positives = sum(item in bloom for item in digests(10_000, 100_000))
+
+    assert false_positives / 100_000 < 0.015
+    assert 0.005 < bloom.false_positive_rate() < 0.015
+    # about 9.6 bits per item at 1%
+    assert bloom.stats()["memory_bytes"] == 11_982
+    assert bloom.hashes == 7
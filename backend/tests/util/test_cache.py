@@ -0,0 +1,25 @@
+import time
+
+from qftb.util.cache import TTLCache
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expiry_and_stats():
+    cache = TTLCache(maxsize=10)
+    cache.set("live", 1, expires_at=time.time() + 60)
+    cache.set("dead", 2, expires_at=time.time() - 1)
+
+    assert cache.get("live") == 1
+    assert cache.get("dead") is None
+    assert cache.stats() == {"size": 1, "maxsize": 10, "hits": 1, "misses": 1, "hit_rate": 0.5}
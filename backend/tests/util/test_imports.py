@@ -0,0 +1,60 @@
+import asyncio
+
+from qftb.util.imports import chunked, read_records
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def records(fmt: str, *chunks: bytes) -> list:
+    async def run():
+        return [record async for record in read_records(stream(*chunks), fmt)]
+
+    return asyncio.run(run())
+
+
+def test_read_records_ndjson_split_across_chunks():
+    result = records("ndjson", b'{"a": 1}\n{"a"', b": 2}\n\n{bad\n", b'{"a": "\xc3', b'\xa9"}')
+
+    assert result[:2] == [(1, {"a": 1}), (2, {"a": 2})]
+    assert result[2][0] == 4 and isinstance(result[2][1], ValueError)
+    assert result[3] == (5, {"a": "é"})
+
+
+def test_read_records_csv_quoted_newline_and_short_rows():
+    result = records("csv", b'a,b\n1,"two\n', b'lines"\n\n3\n"unterminated\n')
+
+    assert result[0] == (3, {"a": "1", "b": "two\nlines"})
+    assert result[1] == (5, {"a": "3", "b": None})
+    assert result[2][0] == 6 and isinstance(result[2][1], ValueError)
+
+
+def test_read_records_csv_stray_quotes_in_unquoted_fields():
+    result = records("csv", b'first,last\nSean,O"Brien\nAnn,Lee\nBob,O"Neil\nCat,Kim\n')
+
+    assert result == [
+        (2, {"first": "Sean", "last": 'O"Brien'}),
+        (3, {"first": "Ann", "last": "Lee"}),
+        (4, {"first": "Bob", "last": 'O"Neil'}),
+        (5, {"first": "Cat", "last": "Kim"}),
+    ]
+
+
+def test_read_records_csv_single_stray_quote():
+    result = records("csv", b'first,last\nSean,O"Brien\nAnn,Lee\n\xff\nCat,"K""im"\n')
+
+    assert result[:2] == [
+        (2, {"first": "Sean", "last": 'O"Brien'}),
+        (3, {"first": "Ann", "last": "Lee"}),
+    ]
+    assert result[2][0] == 4 and isinstance(result[2][1], ValueError)
+    assert result[3] == (5, {"first": "Cat", "last": 'K"im'})
+
+
+def test_chunked():
+    async def run():
+        return [chunk async for chunk in chunked(stream(*b"abcde"), 2)]
+
+    assert asyncio.run(run()) == [[97, 98], [99, 100], [101]]
@@ -0,0 +1,44 @@
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from fastapi.testclient import TestClient
+from jwt.exceptions import InvalidTokenError
+from qftb.util.jwks import KeyRing
+
+KEYS = {
+    "RS256": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+    "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "EdDSA": ed25519.Ed25519PrivateKey.generate,
+}
+
+
+@pytest.mark.parametrize("algorithm", KEYS)
+def test_keyring_sign_verify(algorithm: str):
+    keyring = KeyRing(algorithm, KEYS[algorithm]())
+    token = keyring.encode({"sub": "a@b.com", "id": 1})
+
+    assert jwt.get_unverified_header(token)["kid"] == keyring.active.kid
+    assert keyring.decode(token)["id"] == 1
+    assert [key["kid"] for key in keyring.jwks()["keys"]] == [keyring.active.kid]
+    assert "d" not in keyring.jwks()["keys"][0]
+
+
+def test_keyring_rotation():
+    old_key, new_key = KEYS["ES256"](), KEYS["EdDSA"]()
+    old_token = KeyRing("ES256", old_key).encode({"id": 1})
+
+    rotated = KeyRing("EdDSA", new_key, retired_keys=[old_key.public_key()])
+    assert rotated.decode(old_token)["id"] == 1
+    assert len(rotated.jwks()["keys"]) == 2
+
+    # once the old key is dropped its tokens are rejected
+    with pytest.raises(InvalidTokenError):
+        KeyRing("EdDSA", new_key).decode(old_token)
+
+
+def test_jwks_endpoint_hmac(client: TestClient):
+    res = client.get("/.well-known/jwks.json")
+
+    assert res.status_code == 200
+    assert res.json() == {"keys": []}
+    assert res.headers["cache-control"].startswith("public, max-age=")
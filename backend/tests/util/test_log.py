@@ -0,0 +1,86 @@
+import io
+import json
+import logging
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from qftb.util.log import (
+    JsonFormatter,
+    RequestIdFilter,
+    RequestIdMiddleware,
+    queue_handler,
+    request_id,
+)
+
+
+class BlockedStream(io.StringIO):
+    """
+    A log sink that blocks writes until released, like a full pipe.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+
+    def write(self, s: str) -> int:
+        self.released.wait(timeout=5)
+        return super().write(s)
+
+
+def test_request_id_echoed_and_bound():
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/id")
+    async def current_id():
+        return {"id": request_id.get()}
+
+    client = TestClient(app)
+    res = client.get("/id", headers={"X-Request-ID": "edge-42"})
+    assert res.headers["X-Request-ID"] == "edge-42"
+    assert res.json() == {"id": "edge-42"}
+
+    res = client.get("/id", headers={"X-Request-ID": "no spaces {allowed}"})
+    generated = res.headers["X-Request-ID"]
+    assert len(generated) == 32
+    assert res.json() == {"id": generated}
+    assert request_id.get() is None
+
+
+def test_queue_handler_does_not_block_on_slow_sink():
+    stream = BlockedStream()
+    target = logging.StreamHandler(stream)
+    target.setFormatter(JsonFormatter())
+    handler = queue_handler([target])
+    handler.addFilter(RequestIdFilter())
+    logger = logging.getLogger("tests.log.queue")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    handler.listener.start()
+
+    token = request_id.set("req-1")
+    try:
+        start = time.perf_counter()
+        logger.info("Refresh token issued for user %s", 7, extra={"route": "/auth/login"})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Login failed for user %s", 7)
+        elapsed = time.perf_counter() - start
+    finally:
+        request_id.reset(token)
+        stream.released.set()
+        handler.listener.stop()
+        logger.removeHandler(handler)
+
+    assert elapsed < 1
+    issued, failed = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert issued["message"] == "Refresh token issued for user 7"
+    assert issued["request_id"] == "req-1"
+    assert issued["route"] == "/auth/login"
+    assert issued["level"] == "INFO"
+    assert failed["logger"] == "tests.log.queue"
+    assert "ValueError: boom" in failed["exc_info"]
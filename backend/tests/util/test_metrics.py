@@ -0,0 +1,70 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from qftb.routers import metrics
+from qftb.util.metrics import MetricsMiddleware, instrument_engine
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_timed_by_route_template():
+    app = FastAPI()
+    app.include_router(metrics.router)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = sample("qftb_http_request_duration_seconds_count", **labels)
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    assert sample("qftb_http_request_duration_seconds_count", **labels) == before + 2
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert 'route="<unmatched>",status="404"' in res.text
+
+
+def test_query_duration_by_statement():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    instrument_engine(engine.sync_engine)
+    before = sample("qftb_db_query_duration_seconds_count", statement="SELECT")
+
+    async def run():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        await engine.dispose()
+
+    asyncio.run(run())
+
+    assert sample("qftb_db_query_duration_seconds_count", statement="SELECT") == before + 1
+
+
+def test_login_counters(client: TestClient):
+    user = {
+        "firstName": "Sam",
+        "lastName": "Iam",
+        "email": "greeneggs@ham.com",
+        "password": "1Wouldyoulikesomegreeneggsandham",
+    }
+    client.post("/user", json=user)
+    success = sample("qftb_logins_total", result="success")
+    failure = sample("qftb_logins_total", result="failure")
+    verify = sample("qftb_password_hash_duration_seconds_count", operation="verify")
+
+    client.post("/auth/login", data={"username": user["email"], "password": user["password"]})
+    client.post("/auth/login", data={"username": user["email"], "password": "1Wrongpassword"})
+
+    assert sample("qftb_logins_total", result="success") == success + 1
+    assert sample("qftb_logins_total", result="failure") == failure + 1
+    assert sample("qftb_password_hash_duration_seconds_count", operation="verify") == verify + 2
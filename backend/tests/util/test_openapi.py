@@ -0,0 +1,24 @@
+from fastapi import FastAPI
+from qftb.util.openapi import custom_openapi
+
+
+def test_schema_published_only_when_complete(monkeypatch):
+    app = FastAPI()
+    custom_openapi(app)
+
+    class Responses(dict):
+        def __delitem__(self, key):
+            # a concurrent /openapi.json must not see the schema being edited
+            assert app.openapi_schema is None
+            super().__delitem__(key)
+
+    responses = Responses({"200": {}, "422": {}})
+    monkeypatch.setattr(
+        "qftb.util.openapi.get_openapi",
+        lambda **kwargs: {"paths": {"/user": {"post": {"responses": responses}}}},
+    )
+
+    schema = app.openapi()
+
+    assert app.openapi_schema is schema
+    assert list(schema["paths"]["/user"]["post"]["responses"]) == ["200"]
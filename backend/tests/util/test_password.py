@@ -0,0 +1,50 @@
+import asyncio
+
+from qftb.util import password
+
+
+def test_calibrate_prefers_memory_then_time(monkeypatch):
+    # verify time grows with time_cost * memory_cost: 10 ms per pass over 16 MiB
+    def fake_p99(executor, time_cost, memory_cost, parallelism, samples):
+        return time_cost * memory_cost / (16 * 1024) * 10
+
+    monkeypatch.setattr(password, "verify_p99_ms", fake_p99)
+
+    time_cost, memory_cost, p99 = password.calibrate(
+        target_p99_ms=50, parallelism=1, max_memory_cost=256 * 1024
+    )
+
+    # 256 -> 128 -> 64 MiB until one pass fits, then as many passes as fit
+    assert (time_cost, memory_cost, p99) == (1, 64 * 1024, 40)
+
+
+def test_calibrate_stops_at_memory_floor(monkeypatch):
+    monkeypatch.setattr(password, "verify_p99_ms", lambda *args: 500.0)
+
+    time_cost, memory_cost, p99 = password.calibrate(
+        target_p99_ms=50, parallelism=1, max_memory_cost=256 * 1024
+    )
+
+    assert (time_cost, memory_cost) == (1, password.MIN_MEMORY_COST)
+    assert p99 > 50
+
+
+def test_needs_rehash():
+    assert not password.needs_rehash(password.hash("1Wouldyoulikesomegreeneggsandham"))
+    assert password.needs_rehash(password.argon2.PasswordHasher(time_cost=1).hash("x"))
+
+
+def test_broken_pool_is_replaced(caplog):
+    async def run():
+        assert await password.verify_password_async("x", password.hash("x"))
+        # an OOM killed worker breaks the whole pool
+        for process in list(password.get_executor()._processes.values()):
+            process.kill()
+            process.join()
+        return await password.verify_password_async("x", password.hash("x"))
+
+    try:
+        assert asyncio.run(run())
+    finally:
+        password.shutdown_executor()
+    assert "Password hashing pool broken" in caplog.text
@@ -0,0 +1,85 @@
+import asyncio
+import os
+
+import pytest
+import sqlalchemy.exc
+from fastapi.testclient import TestClient
+from qftb.config import settings
+from qftb.database import async_engine
+from qftb.util.pool import InstrumentedQueuePool, pool_status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+
+def test_pool_status_records_checkouts(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=2,
+        max_overflow=1,
+    )
+
+    async def run():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            during = pool_status(engine.pool)
+        await engine.dispose()
+        return during
+
+    during = asyncio.run(run())
+    after = pool_status(engine.pool)
+
+    assert during["checked_out"] == 1
+    assert after["checked_out"] == 0
+    assert after["checkouts"] == 1
+    assert after["timeouts"] == 0
+
+
+def test_health_pool(client: TestClient, monkeypatch):
+    assert client.get("/health/pool").status_code == 403
+
+    monkeypatch.setattr(settings, "ALLOWED_IP_ADDRESSES", ["testclient"])
+    res = client.get("/health/pool")
+    assert res.status_code == 200
+
+
+def test_forked_child_gets_fresh_pool():
+    parent_pool = id(async_engine.sync_engine.pool)
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        fresh = id(async_engine.sync_engine.pool) != parent_pool
+        os.write(write, b"1" if fresh else b"0")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read, 1) == b"1"
+    assert id(async_engine.sync_engine.pool) == parent_pool
+
+
+def test_pool_counts_only_checkout_timeouts(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    broken = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'pool.db'}", poolclass=InstrumentedQueuePool
+    )
+
+    async def run():
+        async with engine.connect():
+            with pytest.raises(sqlalchemy.exc.TimeoutError):
+                async with engine.connect():
+                    pass
+        with pytest.raises(sqlalchemy.exc.OperationalError):
+            async with broken.connect():
+                pass
+        await engine.dispose()
+        await broken.dispose()
+
+    asyncio.run(run())
+
+    assert pool_status(engine.pool)["timeouts"] == 1
+    assert pool_status(broken.pool)["timeouts"] == 0
@@ -0,0 +1,33 @@
+import asyncio
+from types import SimpleNamespace
+
+from qftb.util.ratelimit import MemoryRateLimiter
+
+
+def hits(limiter: MemoryRateLimiter, *keys: str) -> list[bool]:
+    async def run():
+        return [await limiter.hit(key) for key in keys]
+
+    return asyncio.run(run())
+
+
+def test_memory_rate_limiter_per_key():
+    limiter = MemoryRateLimiter(limit=2, window=60)
+    assert hits(limiter, "1", "1", "1", "2") == [True, True, False, True]
+
+
+def test_memory_rate_limiter_refills(monkeypatch):
+    clock = SimpleNamespace(monotonic=lambda: 0.0)
+    monkeypatch.setattr("qftb.util.ratelimit.time", clock)
+    limiter = MemoryRateLimiter(limit=2, window=60)
+    assert hits(limiter, "1", "1", "1") == [True, True, False]
+
+    # one token back after half the window
+    clock.monotonic = lambda: 30.0
+    assert hits(limiter, "1", "1") == [True, False]
+
+
+def test_memory_rate_limiter_bounded():
+    limiter = MemoryRateLimiter(limit=1, window=60, max_keys=2)
+    hits(limiter, "1", "2", "3")
+    assert list(limiter._buckets) == ["2", "3"]
@@ -0,0 +1,60 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from qftb.util.replicas import ReadYourWritesMiddleware, ReplicaSet, primary_pinned, track_writes
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+
+def test_pick_round_robin_skips_unhealthy_replicas(tmp_path):
+    engines = [create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/{name}.db") for name in "abc"]
+    # a database file in a missing directory cannot be opened
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/b.db")
+    engines[1] = broken
+    replicas = ReplicaSet(engines, timeout=5)
+
+    assert [replicas.pick() for _ in range(3)] == engines
+
+    asyncio.run(replicas.check())
+
+    assert [replicas.pick() for _ in range(4)] == [engines[0], engines[2]] * 2
+    assert [status["healthy"] for status in replicas.status()] == [True, False, True]
+
+
+def test_pick_without_healthy_replicas_falls_back_to_primary():
+    replicas = ReplicaSet([create_async_engine("sqlite+aiosqlite://")])
+    replicas.healthy.clear()
+
+    assert replicas.pick() is None
+    assert ReplicaSet([]).pick() is None
+
+
+def test_read_your_writes_pins_the_client_after_a_write():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    track_writes(engine.sync_engine)
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, window=5)
+
+    @app.get("/pinned")
+    async def pinned():
+        return primary_pinned()
+
+    @app.post("/write")
+    async def write():
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE IF NOT EXISTS t (x INTEGER)"))
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+
+    @app.get("/read")
+    async def read():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    client = TestClient(app)
+    assert "set-cookie" not in client.get("/read").headers
+    assert client.get("/pinned").json() is False
+
+    res = client.post("/write")
+    assert "readPrimary=1; Max-Age=5" in res.headers["set-cookie"]
+    assert client.get("/pinned").json() is True
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from qftb.schemas import Token
+from qftb.util.responses import FastJSONResponse, etag, etag_matches, model_response
+
+
+def test_fast_json_response_matches_json_response():
+    content = {"Status": "Healthy", "name": "crème", "items": [1, 2.5, None, True]}
+
+    assert FastJSONResponse(content).body == JSONResponse(content).body
+
+
+def test_fast_json_response_encodes_datetimes():
+    at = datetime(2024, 1, 2, 3, 4, 5)
+
+    assert FastJSONResponse({"at": at}).body == JSONResponse(jsonable_encoder({"at": at})).body
+
+
+def test_model_response_uses_aliases():
+    res = model_response(Token(access_token="abc", token_type="bearer"), status_code=201)
+
+    assert res.status_code == 201
+    assert res.media_type == "application/json"
+    assert res.body == b'{"accessToken":"abc","tokenType":"bearer"}'
+
+
+def test_etag_matches():
+    current = etag(b'{"id":1}')
+
+    assert current != etag(b'{"id":2}')
+    assert etag_matches(current, current)
+    assert etag_matches(f'"other", W/{current}', current)
+    assert etag_matches("*", current)
+    assert not etag_matches('"other"', current)
+    assert not etag_matches(None, current)
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from qftb.config import settings
+from qftb.main import app
+from qftb.util.tracing import TracingMiddleware, _span_exporter, trace_engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+exporter = InMemorySpanExporter()
+
+
+@pytest.fixture
+def spans(client: TestClient, engine: AsyncEngine):
+    # the global provider can only be set once per process
+    if not isinstance(trace.get_tracer_provider(), TracerProvider):
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        trace.set_tracer_provider(provider)
+    trace_engine(engine.sync_engine)
+    exporter.clear()
+    yield exporter
+    exporter.clear()
+
+
+def test_login_span_tree(client: TestClient, spans: InMemorySpanExporter):
+    user = {
+        "firstName": "Sam",
+        "lastName": "Iam",
+        "email": "greeneggs@ham.com",
+        "password": "1Wouldyoulikesomegreeneggsandham",
+    }
+    client.post("/user", json=user)
+    spans.clear()
+
+    traced = TestClient(TracingMiddleware(app))
+    traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    res = traced.post(
+        "/auth/login",
+        data={"username": user["email"], "password": user["password"]},
+        headers={"traceparent": traceparent},
+    )
+    assert res.status_code == 200
+
+    finished = spans.get_finished_spans()
+    root = next(
+        span
+        for span in finished
+        if span.name == "POST /auth/login" and span.instrumentation_scope.name == "qftb"
+    )
+    assert format(root.context.trace_id, "032x") == "0af7651916cd43dd8448eb211c80319c"
+    assert root.attributes["http.response.status_code"] == 200
+
+    # newer FastAPI versions add their own request/dependency/endpoint spans
+    ours = sorted(
+        (
+            span
+            for span in finished
+            if span.context.trace_id == root.context.trace_id
+            and span is not root
+            and span.instrumentation_scope.name == "qftb"
+        ),
+        key=lambda span: span.start_time,
+    )
+    assert [span.name for span in ours] == [
+        "SELECT",
+        "argon2.verify",
+        "UPDATE",
+        "DELETE",
+        "INSERT",
+        "jwt.encode",
+    ]
+
+
+def test_file_exporter_closes_its_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_EXPORTER", "file")
+    monkeypatch.setattr(settings, "TRACING_FILE", str(tmp_path / "traces.jsonl"))
+    span_exporter = _span_exporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+    provider.get_tracer("test").start_span("work").end()
+
+    provider.shutdown()
+
+    assert span_exporter.out.closed
+    assert json.loads((tmp_path / "traces.jsonl").read_text())["name"] == "work"